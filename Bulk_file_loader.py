@@ -16,8 +16,11 @@ for filename in os.listdir(to_upload_folder):
     file_path = os.path.join(to_upload_folder, filename)
     if os.path.isfile(file_path):
         print(f"Processing: {file_path}")
-        subprocess.run(
+        result = subprocess.run(
             ["python", "enricher.py", "--file", file_path],
             cwd=os.path.dirname(__file__),
-            check=True,
         )
+        # enricher.py exits non-zero for failed items (unsupported type, empty PDF,
+        # transient errors); log it and carry on with the rest of the folder.
+        if result.returncode != 0:
+            print(f"Failed (exit code {result.returncode}): {file_path}")
@@ -1,13 +1,25 @@
 # app.py
+import heapq
 import subprocess
 import sys
-from flask import Flask, jsonify, request, render_template, Response
+from flask import Flask, Request, g, jsonify, request, render_template
 import sqlite3
 from threading import Thread
 import queue
 import os
-from werkzeug.utils import secure_filename
+import time
 import config
+import batch_store
+import facets
+import http_encoding
+import jobs
+import library_io
+import profiling
+import resilience
+import routing
+import sync
+import upload_store
+import urls
 from flask import send_from_directory
 
 
@@ -16,16 +28,59 @@ LOCK_FILE = "enrichment.lock"
 UPLOAD_FOLDER = "uploads"
 os.makedirs(UPLOAD_FOLDER, exist_ok=True)
 
+
+class UploadRequest(Request):
+    """
+    Streams file parts sent to the upload and import endpoints straight to disk,
+    hashing them on the way. Other endpoints keep Werkzeug's default streams.
+    """
+
+    spooled_endpoints = {"upload_file", "import_library"}
+
+    def _get_file_stream(
+        self, total_content_length, content_type, filename=None, content_length=None
+    ):
+        if self.endpoint in self.spooled_endpoints:
+            return upload_store.HashingSpool(UPLOAD_FOLDER)
+        return super()._get_file_stream(
+            total_content_length, content_type, filename, content_length
+        )
+
+
 app = Flask(__name__)
+app.request_class = UploadRequest
+app.json = http_encoding.FastJSONProvider(app)
+app.after_request(http_encoding.compress_response)
 app.config["UPLOAD_FOLDER"] = UPLOAD_FOLDER
 
 
+@app.before_request
+def start_request_profile():
+    """Profiles /api/* requests when profiling is enabled or the request has ?profile=1."""
+    if not request.path.startswith("/api/") or request.path.startswith("/api/admin/"):
+        return
+    if profiling.enabled() or request.args.get("profile") == "1":
+        g.profiler = profiling.start()
+
+
+@app.after_request
+def save_request_profile(response):
+    # Streamed response bodies are generated after this point and are not included.
+    profiler = g.pop("profiler", None)
+    if profiler is not None:
+        profiler.disable()
+        response.headers["X-Profile"] = profiling.save(
+            profiler, "api", f"{request.method}-{request.path}"
+        )
+    return response
+
+
 @app.route("/uploads/<path:filename>")
 def uploaded_file(filename):
     return send_from_directory(app.config["UPLOAD_FOLDER"], filename)
 
 
-# --- Database & Batch File Functions ---
+# --- Database Functions ---
 def get_db_connection():
     conn = sqlite3.connect(config.DB_FILE, check_same_thread=False)
     conn.row_factory = sqlite3.Row
@@ -51,69 +106,195 @@ def setup_database():
             playlist_id INTEGER, FOREIGN KEY (playlist_id) REFERENCES playlists (id)
         )"""
     )
+    jobs.setup_jobs_tables(conn)
+    resilience.setup_circuit_table(conn)
+    routing.setup_route_stats_table(conn)
     for col in ["thumbnail_url", "uploader", "duration", "category", "playlist_id"]:
         try:
             conn.execute(f"ALTER TABLE videos ADD COLUMN {col} TEXT")
         except sqlite3.OperationalError:
             pass
     conn.commit()
+    urls.setup_url_keys(conn)
+    facets.setup_facet_tables(conn)
+    sync.setup_sync_tables(conn)
+    batch_store.setup_batch_table(conn)
+    batch_store.import_legacy_file(conn)
     conn.close()
+    upload_store.remove_stale_parts(UPLOAD_FOLDER)
     print("Database setup complete.")
 
 
-def load_batch_links():
-    batch_links = []
-    try:
-        if os.path.exists("batch_links.txt"):
-            with open("batch_links.txt", "r") as f:
-                batch_links = [line.strip() for line in f if line.strip()]
-    except Exception as e:
-        print(f"Error loading batch_links.txt: {e}")
-    return batch_links
+# --- Backend Enrichment Task ---
+def run_enricher(item, process_env):
+    """Runs enricher.py for a single URL or file path and returns its exit code."""
+    # Determine if item is a sync request, a URL or a file path
+    if item.startswith(sync.SYNC_ITEM_PREFIX):
+        arg_type, item = "--sync", item[len(sync.SYNC_ITEM_PREFIX) :]
+    else:
+        arg_type = "--url" if item.startswith("http") else "--file"
+
+    process = subprocess.Popen(
+        [sys.executable, config.ENRICHER_SCRIPT_PATH, arg_type, item],
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        bufsize=1,
+        universal_newlines=True,
+        encoding="utf-8",
+        env=process_env,
+    )
+    for line in iter(process.stdout.readline, ""):
+        log_queue.put(line.strip())
+    process.stdout.close()
+    return process.wait()
+
+
+def wait_for_open_circuits():
+    """Pauses the scheduler while the circuit of any external service is open."""
+    while True:
+        waits = resilience.open_circuits()
+        if not waits:
+            return
+        wait = max(waits.values())
+        log_queue.put(
+            f"Circuit open for {', '.join(sorted(waits))}; pausing batch for {wait:.0f}s..."
+        )
+        # Sleep in short slices so the log stream keeps receiving heartbeats.
+        time.sleep(min(wait, 30))
 
 
-# --- Backend Enrichment Task ---
-def run_enrichment_process(items_to_process):
+def run_enrichment_process(batch_scopes, profile=False):
     """
-    Runs the enricher.py script for a list of URLs or file paths.
+    Runs the enricher.py script for every unfinished item of the given checkpointed
+    batches, then for any batch queued while it was running. The caller must hold
+    LOCK_FILE; it is released when the run ends. With profile, every item of this
+    run writes a profile.
     """
     global log_queue
-    with open(LOCK_FILE, "w") as f:
-        f.write("running")
-
-    log_queue.put(f"Starting batch process for {len(items_to_process)} item(s)...")
+    conn = get_db_connection()
+    completed = False
     try:
         process_env = os.environ.copy()
         process_env["PYTHONIOENCODING"] = "utf-8"
-
-        for i, item in enumerate(items_to_process):
-            log_queue.put(
-                f"\n--- Processing item {i+1} of {len(items_to_process)}: {os.path.basename(item)} ---"
-            )
-
-            # Determine if item is a URL or a file path
-            arg_type = "--url" if item.startswith("http") else "--file"
-
-            process = subprocess.Popen(
-                [sys.executable, config.ENRICHER_SCRIPT_PATH, arg_type, item],
-                stdout=subprocess.PIPE,
-                stderr=subprocess.STDOUT,
-                text=True,
-                bufsize=1,
-                universal_newlines=True,
-                encoding="utf-8",
-                env=process_env,
-            )
-            for line in iter(process.stdout.readline, ""):
-                log_queue.put(line.strip())
-            process.stdout.close()
-            process.wait()
+        if profile:
+            process_env[config.PROFILE_ENV_VAR] = "1"
+
+        while batch_scopes:
+            for scope in batch_scopes:
+                run_batch(conn, scope, process_env)
+            batch_scopes = jobs.unfinished_batches(conn)
+        completed = True
     except Exception as e:
         log_queue.put(f"FATAL: A subprocess failed: {e}")
     finally:
+        conn.close()
         log_queue.put("__STREAM_END__")
-        if os.path.exists(LOCK_FILE):
-            os.remove(LOCK_FILE)
+        jobs.release_lock(LOCK_FILE)
+    if completed:
+        # Catch batches queued between the last check and releasing the lock.
+        start_pending_batches()
+
+
+def run_batch(conn, scope, process_env):
+    """Processes the unfinished items of one checkpointed batch in order."""
+    counts = jobs.count_items(conn, scope)
+    total = sum(counts.values())
+    finished = counts.get(jobs.DONE, 0) + counts.get(jobs.FAILED, 0)
+    if finished:
+        log_queue.put(
+            f"Resuming batch {scope}: {finished} of {total} item(s) already finished."
+        )
+    else:
+        log_queue.put(f"Starting batch process for {total} item(s)...")
+
+    while True:
+        row = jobs.next_item(conn, scope)
+        if row is None:
+            break
+        item, attempts = row["item"], row["attempts"]
+        wait_for_open_circuits()
+        if attempts:
+            delay = resilience.backoff_delay(attempts)
+            log_queue.put(f"Retrying {item} in {delay:.1f}s (attempt {attempts + 1})...")
+            time.sleep(delay)
+        else:
+            finished += 1
+        jobs.mark_running(conn, scope, item)
+        log_queue.put(
+            f"\n--- Processing item {finished} of {total}: {os.path.basename(item)} ---"
+        )
+        returncode = run_enricher(item, process_env)
+        if returncode == 0:
+            jobs.mark_done(conn, scope, item)
+            batch_store.set_status(conn, [item], batch_store.DONE)
+        elif (
+            returncode == resilience.EXIT_RETRY
+            and attempts + 1 < config.MAX_ITEM_ATTEMPTS
+        ):
+            jobs.requeue(conn, scope, item, "transient failure")
+            log_queue.put(
+                f"Item hit a transient error and was re-queued "
+                f"(attempt {attempts + 1} of {config.MAX_ITEM_ATTEMPTS}): {item}"
+            )
+        else:
+            error = f"enricher exited with code {returncode}"
+            jobs.mark_failed(conn, scope, item, error)
+            batch_store.set_status(conn, [item], batch_store.FAILED, error)
+            log_queue.put(f"Item failed (exit code {returncode}): {item}")
+
+
+def start_enrichment(items, profile=False):
+    """Checkpoints the items as a new batch and runs it. Caller must hold LOCK_FILE."""
+    conn = get_db_connection()
+    scope = jobs.create_batch(conn, items)
+    batch_store.set_status(conn, items, batch_store.QUEUED)
+    conn.close()
+    Thread(target=run_enrichment_process, args=([scope], profile)).start()
+
+
+def start_pending_batches():
+    """
+    Starts a run for any batch that is queued or was interrupted (resuming from its
+    first unfinished item), unless a live process already holds the lock. The lock
+    of a dead server is released by the OS, so it never blocks a restart.
+    """
+    if not jobs.acquire_lock(LOCK_FILE):
+        return
+    conn = get_db_connection()
+    scopes = jobs.unfinished_batches(conn)
+    conn.close()
+    if not scopes:
+        jobs.release_lock(LOCK_FILE)
+        return
+    print(f"Starting {len(scopes)} pending batch(es)...")
+    Thread(target=run_enrichment_process, args=(scopes,)).start()
+
+
+def queue_due_syncs(force=False):
+    """Queues a sync for every followed source that is due (or all of them with force)."""
+    conn = get_db_connection()
+    due = sync.claim_due_sources(conn, force)
+    if due:
+        jobs.create_batch(conn, [sync.SYNC_ITEM_PREFIX + url for url in due])
+    conn.close()
+    if due:
+        start_pending_batches()
+    return len(due)
+
+
+def run_sync_scheduler():
+    """Background loop that periodically queues due playlist and channel syncs."""
+    while True:
+        try:
+            queue_due_syncs()
+        except Exception as e:
+            print(f"Sync scheduler error: {e}")
+        time.sleep(config.SYNC_CHECK_INTERVAL_SECONDS)
+
+
+def start_sync_scheduler():
+    Thread(target=run_sync_scheduler, daemon=True).start()
 
 
 # --- API Endpoints ---
@@ -128,102 +309,302 @@ def stream_logs():
         while True:
             try:
                 message = log_queue.get(timeout=60)
-                yield f"data: {message}\n\n"
+                yield f"data: {message}\n\n".encode("utf-8")
                 if message == "__STREAM_END__":
                     break
             except queue.Empty:
                 break
 
-    return Response(generate(), mimetype="text/event-stream")
+    return http_encoding.stream_response(generate(), "text/event-stream", flush_each=True)
 
 
 @app.route("/api/status", methods=["GET"])
 def get_status():
-    return jsonify({"is_running": os.path.exists(LOCK_FILE)})
+    return jsonify({"is_running": jobs.lock_is_held(LOCK_FILE)})
 
 
-@app.route("/api/library", methods=["GET"])
-def get_library():
-    conn = get_db_connection()
+def iter_library(conn):
+    """
+    Yields playlists (with their videos) and standalone videos, newest first.
+    Both queries are already sorted, so they are merged lazily instead of
+    loading and sorting the whole library.
+    """
     playlists_raw = conn.execute(
         "SELECT * FROM playlists ORDER BY processed_at DESC"
     ).fetchall()
-    playlists = []
-    for p_raw in playlists_raw:
-        playlist = dict(p_raw)
-        playlist["type"] = "playlist"
-        videos_raw = conn.execute(
-            "SELECT * FROM videos WHERE playlist_id = ? ORDER BY id", (playlist["id"],)
-        ).fetchall()
-        playlist["videos"] = [dict(v_raw) for v_raw in videos_raw]
-        playlists.append(playlist)
+
+    def playlists():
+        for p_raw in playlists_raw:
+            playlist = dict(p_raw)
+            playlist["type"] = "playlist"
+            videos_raw = conn.execute(
+                "SELECT * FROM videos WHERE playlist_id = ? ORDER BY id", (playlist["id"],)
+            ).fetchall()
+            playlist["videos"] = [dict(v_raw) for v_raw in videos_raw]
+            yield playlist
+
     standalone_videos = conn.execute(
         "SELECT * FROM videos WHERE playlist_id IS NULL ORDER BY processed_at DESC"
-    ).fetchall()
+    )
+    return heapq.merge(
+        playlists(),
+        (dict(v) for v in standalone_videos),
+        key=lambda x: x["processed_at"],
+        reverse=True,
+    )
+
+
+@app.route("/api/library", methods=["GET"])
+def get_library():
+    """Streams the library as one JSON array, encoded and compressed in batches."""
+
+    def generate():
+        conn = get_db_connection()
+        try:
+            yield from http_encoding.iter_json_array(iter_library(conn))
+        finally:
+            conn.close()
+
+    return http_encoding.stream_response(generate(), "application/json")
+
+
+@app.route("/api/routing/stats", methods=["GET"])
+def get_routing_stats():
+    """Per route and model: call counts, failures, fallbacks, latency and token usage."""
+    conn = get_db_connection()
+    stats = routing.route_stats(conn)
     conn.close()
-    library_items = playlists + [dict(v) for v in standalone_videos]
-    library_items.sort(key=lambda x: x["processed_at"], reverse=True)
-    return jsonify(library_items)
+    return jsonify(stats)
 
 
-@app.route("/api/batch/links", methods=["GET"])
-def get_batch_links():
-    batch_links = load_batch_links()
+@app.route("/api/export", methods=["GET"])
+def export_library():
+    """
+    Streams the whole library as an attachment. `format` is ndjson (default),
+    csv or parquet; rows are read and encoded in batches, never all at once.
+    """
+    fmt = request.args.get("format", default="ndjson").lower()
+    try:
+        library_io.check_format(fmt)
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    mimetype, extension = library_io.FORMATS[fmt]
+
+    def generate():
+        conn = get_db_connection()
+        try:
+            yield from library_io.export_chunks(conn, fmt)
+        finally:
+            conn.close()
+
+    filename = f"library-{time.strftime('%Y%m%d-%H%M%S')}{extension}"
+    return http_encoding.stream_response(
+        generate(),
+        mimetype,
+        headers={"Content-Disposition": f"attachment; filename={filename}"},
+    )
+
+
+def run_import(spool, fmt):
+    """Imports an uploaded export in the background, then deletes the spooled file."""
+    conn = None
+    try:
+        conn = get_db_connection()
+        imported = library_io.import_file(conn, spool.path, fmt, log=log_queue.put)
+        log_queue.put(f"Library import complete: {imported} video(s).")
+    except (sqlite3.Error, ValueError, OSError) as e:
+        log_queue.put(f"ERROR: Library import failed: {e}")
+    finally:
+        if conn is not None:
+            conn.close()
+        spool.discard()
+
+
+@app.route("/api/import", methods=["POST"])
+def import_library():
+    """
+    Imports an export file sent as the `file` part. The format comes from the
+    `format` field or the file extension. Runs in the background; progress goes
+    to the log stream.
+    """
+    file = request.files.get("file")
+    parts = [part for _, part in request.files.items(multi=True)]
+    if not file or not file.filename:
+        upload_store.discard_unused(parts)
+        return jsonify({"error": "No selected file"}), 400
+    upload_store.discard_unused(parts, keep=[file])
+    fmt = request.form.get("format") or library_io.format_from_path(file.filename)
+    try:
+        library_io.check_format(fmt)
+    except ValueError as e:
+        file.stream.discard()
+        return jsonify({"error": str(e)}), 400
+    # The upload is already on disk (see UploadRequest); hand the file to the importer.
+    file.stream.file.close()
+    Thread(target=run_import, args=(file.stream, fmt)).start()
+    return jsonify({"message": "Library import started."}), 202
+
+
+@app.route("/api/facets", methods=["GET"])
+def get_facets():
+    """
+    Returns tag and category histograms plus the items matching the filters.
+    Filters: repeated `tag` parameters (items must carry all of them) and `category`.
+    Paging: `limit` (default 50, max 500) and `offset`; `tag_limit` caps the tag histogram.
+    """
+    tags = request.args.getlist("tag")
+    category = request.args.get("category")
+    limit = max(1, min(request.args.get("limit", default=50, type=int), 500))
+    offset = max(0, request.args.get("offset", default=0, type=int))
+    tag_limit = max(1, request.args.get("tag_limit", default=100, type=int))
     conn = get_db_connection()
-    cursor = conn.cursor()
-    processed_urls = set()
-    for row in cursor.execute("SELECT url FROM videos").fetchall():
-        processed_urls.add(row["url"].split("&")[0])
-    for row in cursor.execute("SELECT url FROM playlists").fetchall():
-        processed_urls.add(row["url"].split("&")[0])
+    rows, total = facets.filter_videos(conn, tags, category, limit, offset)
+    result = {
+        "tags": facets.tag_histogram(conn, tag_limit),
+        "categories": facets.category_histogram(conn),
+        "total": total,
+        "items": [dict(row) for row in rows],
+    }
     conn.close()
-    links_with_status = [
-        {"url": url, "processed": url.split("&")[0] in processed_urls}
-        for url in batch_links
+    return jsonify(result)
+
+
+def link_statuses(conn, rows):
+    processed_keys = urls.find_existing_keys(conn, [row["url_key"] for row in rows])
+    return [
+        {
+            "url": row["url"],
+            "status": row["status"],
+            "processed": row["url_key"] in processed_keys,
+        }
+        for row in rows
     ]
-    return jsonify(links_with_status)
+
+
+@app.route("/api/batch/links", methods=["GET"])
+def get_batch_links():
+    """
+    Lists batch links with their library status. Supports optional `page` and
+    `per_page` query parameters; the total is returned in X-Total-Count.
+    Without `page` the whole list is streamed.
+    """
+    status = request.args.get("status")
+    page = request.args.get("page", type=int)
+    per_page = request.args.get("per_page", default=100, type=int)
+    conn = get_db_connection()
+    total = batch_store.count_links(conn, status)
+    if page is None:
+        conn.close()
+
+        def generate():
+            conn = get_db_connection()
+            try:
+                links = (
+                    link
+                    for rows in batch_store.iter_links(conn, status)
+                    for link in link_statuses(conn, rows)
+                )
+                yield from http_encoding.iter_json_array(links)
+            finally:
+                conn.close()
+
+        response = http_encoding.stream_response(generate(), "application/json")
+    else:
+        limit = max(1, min(per_page, 1000))
+        offset = (max(page, 1) - 1) * limit
+        rows = batch_store.list_links(conn, limit, offset, status)
+        response = jsonify(link_statuses(conn, rows))
+        conn.close()
+    response.headers["X-Total-Count"] = str(total)
+    return response
 
 
 @app.route("/api/batch/add_links", methods=["POST"])
 def add_batch_links():
-    """Appends new links to the batch_links.txt file."""
+    """Adds new links to the batch list, skipping ones that are already in it."""
     data = request.get_json()
-    new_links_str = data.get("links")
-    if not new_links_str:
+    links = batch_store.parse_links(data.get("links"))
+    if not links:
         return jsonify({"error": "No links provided"}), 400
     try:
-        with open("batch_links.txt", "a") as f:
-            if f.tell() > 0:
-                f.write("\n")
-            f.write(new_links_str.strip())
-        print(f"Appended new links to batch_links.txt")
-        return jsonify({"message": "Links added successfully to batch file."}), 200
-    except Exception as e:
-        print(f"Error appending to batch_links.txt: {e}")
-        return jsonify({"error": "Could not write to batch file."}), 500
+        conn = get_db_connection()
+        added = batch_store.add_links(conn, links)
+        conn.close()
+        print(f"Added {added} new link(s) to the batch list")
+        return (
+            jsonify(
+                {
+                    "message": "Links added successfully to batch list.",
+                    "added": added,
+                    "duplicates": len(links) - added,
+                }
+            ),
+            200,
+        )
+    except sqlite3.Error as e:
+        print(f"Error adding batch links: {e}")
+        return jsonify({"error": "Could not save batch links."}), 500
 
 
 @app.route("/api/upload", methods=["POST"])
 def upload_file():
-    if os.path.exists(LOCK_FILE):
-        return jsonify({"error": "A process is already running."}), 409
-    if "file" not in request.files:
-        return jsonify({"error": "No file part"}), 400
-    file = request.files["file"]
-    if file.filename == "":
+    """
+    Accepts one or more files (all sent as `file` parts). Files whose content is
+    already in the library or already queued are skipped; new ones are queued for
+    enrichment, behind the running job if there is one.
+    """
+    files = [f for f in request.files.getlist("file") if f.filename]
+    # Empty file inputs and other parts are never stored; delete their spools now.
+    upload_store.discard_unused(
+        [part for _, part in request.files.items(multi=True)], keep=files
+    )
+    if not files:
         return jsonify({"error": "No selected file"}), 400
-    if file:
-        filename = secure_filename(file.filename)
-        filepath = os.path.join(app.config["UPLOAD_FOLDER"], filename)
-        file.save(filepath)
 
-        Thread(target=run_enrichment_process, args=([filepath],)).start()
-        return jsonify({"message": "File upload successful, enrichment started."}), 202
+    conn = get_db_connection()
+    results = []
+    to_enrich = []
+    try:
+        for file in files:
+            sha256, filepath, is_new = upload_store.store_upload(
+                file, app.config["UPLOAD_FOLDER"]
+            )
+            if not is_new and urls.find_existing_keys(
+                conn, [urls.canonical_url_key(filepath)]
+            ):
+                status = "in_library"
+            elif not is_new and jobs.is_queued(conn, filepath):
+                status = "already_queued"
+            elif filepath in to_enrich:
+                status = "duplicate"
+            else:
+                status = "queued"
+                to_enrich.append(filepath)
+            results.append({"name": file.filename, "sha256": sha256, "status": status})
+
+        if to_enrich:
+            jobs.create_batch(conn, to_enrich)
+    finally:
+        conn.close()
+        # Stored parts were already moved or discarded; this only cleans up after an error.
+        upload_store.discard_unused(files)
+    if to_enrich:
+        start_pending_batches()
+    return (
+        jsonify(
+            {
+                "message": f"{len(files)} file(s) uploaded, {len(to_enrich)} queued for enrichment.",
+                "queued": len(to_enrich),
+                "files": results,
+            }
+        ),
+        202,
+    )
 
 
 @app.route("/api/batch/start", methods=["POST"])
 def start_batch():
-    if os.path.exists(LOCK_FILE):
+    if jobs.lock_is_held(LOCK_FILE):
         return jsonify({"error": "A process is already running."}), 409
     while not log_queue.empty():
         try:
@@ -233,7 +614,9 @@ def start_batch():
     urls_to_process = request.get_json().get("urls")
     if not urls_to_process:
         return jsonify({"error": "No URLs provided"}), 400
-    Thread(target=run_enrichment_process, args=(urls_to_process,)).start()
+    if not jobs.acquire_lock(LOCK_FILE):
+        return jsonify({"error": "A process is already running."}), 409
+    start_enrichment(urls_to_process, profile=request.args.get("profile") == "1")
     return jsonify({"message": "Batch process started."}), 202
 
 
@@ -241,15 +624,19 @@ def start_batch():
 def handle_video(video_id):
     conn = get_db_connection()
     if request.method == "PUT":
+        if not conn.execute("SELECT 1 FROM videos WHERE id = ?", (video_id,)).fetchone():
+            conn.close()
+            return jsonify({"error": "Video not found"}), 404
         data = request.get_json()
+        tags = facets.set_video_tags(conn, video_id, data["tags"], commit=False)
         conn.execute(
             "UPDATE videos SET name = ?, uploader = ?, category = ?, summary = ?, tags = ? WHERE id = ?",
             (
                 data["name"],
                 data["uploader"],
-                data["category"],
+                facets.normalize_category(data["category"]),
                 data["summary"],
-                data["tags"],
+                tags,
                 video_id,
             ),
         )
@@ -266,6 +653,7 @@ def handle_video(video_id):
 @app.route("/api/playlists/<int:playlist_id>", methods=["DELETE"])
 def delete_playlist(playlist_id):
     conn = get_db_connection()
+    sync.forget_playlist(conn, playlist_id)
     conn.execute("DELETE FROM videos WHERE playlist_id = ?", (playlist_id,))
     conn.execute("DELETE FROM playlists WHERE id = ?", (playlist_id,))
     conn.commit()
@@ -273,7 +661,89 @@ def delete_playlist(playlist_id):
     return jsonify({"message": "Playlist and all its videos deleted"}), 200
 
 
+@app.route("/api/sync/sources", methods=["GET", "POST"])
+def handle_sync_sources():
+    conn = get_db_connection()
+    if request.method == "POST":
+        data = request.get_json()
+        url = (data.get("url") or "").strip()
+        if not (
+            sync.is_channel_url(url)
+            or urls.canonical_url_key(url).startswith("yt:playlist:")
+        ):
+            conn.close()
+            return jsonify({"error": "Provide a YouTube playlist or channel URL."}), 400
+        try:
+            interval = sync.parse_interval(data.get("interval_hours"))
+        except ValueError as e:
+            conn.close()
+            return jsonify({"error": str(e)}), 400
+        source_id = sync.add_source(conn, url, interval)
+        conn.close()
+        return jsonify({"message": "Source followed.", "id": source_id}), 201
+    sources = [dict(row) for row in sync.list_sources(conn)]
+    conn.close()
+    return jsonify(sources)
+
+
+@app.route("/api/sync/sources/<int:source_id>", methods=["DELETE"])
+def delete_sync_source(source_id):
+    conn = get_db_connection()
+    sync.remove_source(conn, source_id)
+    conn.close()
+    return jsonify({"message": "Source unfollowed"}), 200
+
+
+@app.route("/api/sync/run", methods=["POST"])
+def run_sync():
+    """Queues due syncs now; with {"all": true} every followed source is synced."""
+    data = request.get_json(silent=True) or {}
+    queued = queue_due_syncs(force=bool(data.get("all")))
+    return jsonify({"message": f"Queued {queued} sync(s).", "queued": queued}), 202
+
+
+@app.route("/api/admin/profiles", methods=["GET"])
+def get_profiles():
+    """
+    Lists saved profiles (newest first) and the hottest functions across the
+    newest `count` of them (default 20). Filter with `kind` (video, webpage,
+    file or api); `sort` is cumulative (default), tottime or ncalls.
+    """
+    kind = request.args.get("kind")
+    sort = request.args.get("sort", default="cumulative")
+    if sort not in profiling.SORT_KEYS:
+        return jsonify({"error": f"sort must be one of {', '.join(profiling.SORT_KEYS)}"}), 400
+    count = max(1, request.args.get("count", default=20, type=int))
+    limit = max(1, min(request.args.get("limit", default=25, type=int), 200))
+    names = profiling.list_profiles(kind)
+    return jsonify(
+        {
+            "enabled": profiling.enabled(),
+            "profiles": names,
+            "hot_functions": profiling.hot_functions(names[:count], sort, limit),
+        }
+    )
+
+
+@app.route("/api/admin/profiles/<name>", methods=["GET"])
+def get_profile(name):
+    """Hot functions of one profile; with ?download=1 the raw .prof file."""
+    if name not in profiling.list_profiles():
+        return jsonify({"error": "Profile not found"}), 404
+    if request.args.get("download") == "1":
+        return send_from_directory(config.PROFILE_DIR, name, as_attachment=True)
+    sort = request.args.get("sort", default="cumulative")
+    if sort not in profiling.SORT_KEYS:
+        return jsonify({"error": f"sort must be one of {', '.join(profiling.SORT_KEYS)}"}), 400
+    limit = max(1, min(request.args.get("limit", default=25, type=int), 200))
+    return jsonify({"name": name, "hot_functions": profiling.hot_functions([name], sort, limit)})
+
+
 # --- Main Execution ---
 if __name__ == "__main__":
     setup_database()
+    # With the debug reloader, only the serving child process resumes work.
+    if os.environ.get("WERKZEUG_RUN_MAIN") == "true":
+        start_pending_batches()
+        start_sync_scheduler()
     app.run(host="0.0.0.0", port=5001, debug=True)
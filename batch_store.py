@@ -0,0 +1,146 @@
+# batch_store.py
+# The batch link list, stored in SQLite instead of batch_links.txt.
+# Links are keyed by their canonical URL key (see urls.py), so the same video
+# pasted twice in different forms is only stored once, and concurrent inserts
+# from several Gunicorn workers cannot interleave the way file appends did.
+import argparse
+import os
+import sqlite3
+from datetime import datetime
+
+import config
+import urls
+
+LEGACY_BATCH_FILE = "batch_links.txt"
+
+NEW = "new"
+QUEUED = "queued"
+DONE = "done"
+FAILED = "failed"
+
+
+def setup_batch_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS batch_links (
+            url_key TEXT PRIMARY KEY, url TEXT NOT NULL,
+            status TEXT NOT NULL DEFAULT 'new', last_error TEXT,
+            added_at TIMESTAMP NOT NULL, updated_at TIMESTAMP NOT NULL
+        )"""
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_batch_links_status ON batch_links (status)"
+    )
+    conn.commit()
+
+
+def parse_links(text: str) -> list:
+    """Splits pasted text into individual links (one per line or whitespace separated)."""
+    return [link for link in (text or "").split() if link]
+
+
+def add_links(conn, links: list) -> int:
+    """Bulk-inserts links, skipping any whose canonical key is already stored. Returns the number added."""
+    now = datetime.now()
+    before = conn.total_changes
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO batch_links (url_key, url, status, added_at, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        """,
+        [(urls.canonical_url_key(link), link, NEW, now, now) for link in links],
+    )
+    conn.commit()
+    return conn.total_changes - before
+
+
+def _links_query(status: str = None):
+    sql = "SELECT url_key, url, status, last_error, added_at FROM batch_links"
+    params = []
+    if status:
+        sql += " WHERE status = ?"
+        params.append(status)
+    return sql + " ORDER BY rowid", params
+
+
+def list_links(conn, limit: int = None, offset: int = 0, status: str = None) -> list:
+    """Returns batch links in insertion order, optionally paginated and filtered by status."""
+    sql, params = _links_query(status)
+    if limit is not None:
+        sql += " LIMIT ? OFFSET ?"
+        params += [limit, offset]
+    return conn.execute(sql, params).fetchall()
+
+
+def iter_links(conn, status: str = None, batch_size: int = 1000):
+    """Yields all batch links in insertion order, one batch of rows at a time."""
+    cursor = conn.execute(*_links_query(status))
+    while True:
+        rows = cursor.fetchmany(batch_size)
+        if not rows:
+            return
+        yield rows
+
+
+def count_links(conn, status: str = None) -> int:
+    if status:
+        row = conn.execute(
+            "SELECT COUNT(*) FROM batch_links WHERE status = ?", (status,)
+        ).fetchone()
+    else:
+        row = conn.execute("SELECT COUNT(*) FROM batch_links").fetchone()
+    return row[0]
+
+
+def set_status(conn, items: list, status: str, error: str = None):
+    """Updates the status of the given links (no-op for items not in the batch list)."""
+    now = datetime.now()
+    conn.executemany(
+        "UPDATE batch_links SET status = ?, last_error = ?, updated_at = ? WHERE url_key = ?",
+        [(status, error, now, urls.canonical_url_key(item)) for item in items],
+    )
+    conn.commit()
+
+
+def import_legacy_file(conn, path: str = LEGACY_BATCH_FILE) -> int:
+    """
+    One-time import of the old batch_links.txt. Once the links are committed the
+    file is renamed to '<path>.imported' so it is never imported twice; lines that
+    cannot be decoded are skipped and logged.
+    """
+    try:
+        with open(path, "rb") as f:
+            raw_lines = f.read().splitlines()
+    except FileNotFoundError:
+        # Nothing to import, or another worker already picked the file up.
+        return 0
+    links = []
+    for number, raw in enumerate(raw_lines, start=1):
+        try:
+            line = raw.decode("utf-8").strip()
+        except UnicodeDecodeError as e:
+            print(f"Skipping line {number} of {path}: {e}", flush=True)
+            continue
+        if line:
+            links.append(line)
+    # Inserting is idempotent, so a worker racing this one only re-adds duplicates.
+    added = add_links(conn, links)
+    try:
+        os.replace(path, f"{path}.imported")
+    except FileNotFoundError:
+        pass
+    print(
+        f"Imported {added} of {len(links)} link(s) from {path} ({len(links) - added} duplicate(s))."
+    )
+    return added
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Import a text file of links (one per line) into the batch list."
+    )
+    parser.add_argument("path", nargs="?", default=LEGACY_BATCH_FILE)
+    args = parser.parse_args()
+    conn = sqlite3.connect(config.DB_FILE)
+    setup_batch_table(conn)
+    import_legacy_file(conn, args.path)
+    conn.close()
@@ -0,0 +1,115 @@
+# benchmarks/bench_json_responses.py
+# Compares payload size, serialization time and peak memory of the library
+# response: Flask's default JSON encoding sent uncompressed (before) versus
+# http_encoding's orjson encoder, gzip/brotli compression and streamed
+# encoding (after).
+#
+# Run from the repository root:
+#     python -m benchmarks.bench_json_responses [--videos 20000]
+# Rows are synthetic but shaped like `videos` rows, with the repetitive
+# summaries, URLs and thumbnail links a real library has.
+import argparse
+import json
+import time
+import tracemalloc
+
+from flask.json.provider import DefaultJSONProvider
+
+import config
+import http_encoding
+
+WORDS = (
+    "an overview of the key ideas in this talk covering practical examples "
+    "tips and a short demo of the tools discussed"
+).split()
+
+
+def fake_rows(count: int) -> list:
+    rows = []
+    for n in range(count):
+        video_id = f"v{n:010d}"
+        rows.append(
+            {
+                "id": n + 1,
+                "name": f"Episode {n}: {' '.join(WORDS[n % 7 : n % 7 + 5])}",
+                "url": f"https://www.youtube.com/watch?v={video_id}",
+                "url_key": f"yt:video:{video_id}",
+                "type": "video",
+                "summary": " ".join(WORDS[(n + i) % len(WORDS)] for i in range(30)),
+                "tags": ", ".join(WORDS[(n + i * 3) % len(WORDS)] for i in range(7)),
+                "category": "Education",
+                "thumbnail_url": f"https://i.ytimg.com/vi/{video_id}/maxresdefault.jpg",
+                "uploader": f"Channel {n % 40}",
+                "duration": 300 + n % 3600,
+                "processed_at": f"2024-05-{n % 28 + 1:02d} 12:{n % 60:02d}:00.000000",
+                "playlist_id": None,
+            }
+        )
+    return rows
+
+
+def flask_default(rows) -> int:
+    # What jsonify produced before: stdlib json, sorted keys, compact separators.
+    body = json.dumps(
+        rows, default=DefaultJSONProvider.default, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+    return len(body)
+
+
+def encoded(rows, encoding=None) -> int:
+    body = http_encoding.dumps(rows)
+    return len(http_encoding.compress(body, encoding) if encoding else body)
+
+
+def streamed(rows, encoding) -> int:
+    chunks = http_encoding.iter_json_array(iter(rows))
+    return sum(len(chunk) for chunk in http_encoding.compress_stream(chunks, encoding))
+
+
+def measure(func, *args, repeat: int = 3):
+    """Returns (best seconds, peak traced bytes, payload bytes) for func(*args)."""
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        size = func(*args)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    tracemalloc.start()
+    func(*args)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return best, peak, size
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=20000)
+    args = parser.parse_args()
+    rows = fake_rows(args.videos)
+    encoder = "orjson" if http_encoding.orjson is not None else "json"
+
+    cases = [
+        ("before: json, uncompressed", flask_default, ()),
+        (f"{encoder}, uncompressed", encoded, ()),
+        (f"{encoder} + gzip", encoded, ("gzip",)),
+        (f"streamed {encoder} + gzip", streamed, ("gzip",)),
+    ]
+    if http_encoding.brotli is not None:
+        cases += [
+            (f"{encoder} + brotli", encoded, ("br",)),
+            (f"streamed {encoder} + brotli", streamed, ("br",)),
+        ]
+
+    print(
+        f"Videos: {args.videos}  orjson: {http_encoding.orjson is not None}  "
+        f"brotli: {http_encoding.brotli is not None}  "
+        f"(gzip level {config.GZIP_LEVEL}, brotli quality {config.BROTLI_QUALITY})"
+    )
+    print(f"{'response':<30}{'size KB':>12}{'time ms':>10}{'peak MB':>10}")
+    for name, func, extra in cases:
+        seconds, peak, size = measure(func, rows, *extra)
+        print(f"{name:<30}{size / 1024:>12.1f}{seconds * 1000:>10.1f}{peak / 1024 / 1024:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
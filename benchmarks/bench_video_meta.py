@@ -0,0 +1,111 @@
+# benchmarks/bench_video_meta.py
+# Measures the memory retained per in-flight video when keeping the full
+# yt-dlp info dict versus the compact VideoMeta projection.
+#
+# Run from the repository root:
+#     python -m benchmarks.bench_video_meta [--videos 50]
+# The info dicts are synthetic but shaped like real yt-dlp output (formats with
+# HTTP headers and fragments, thumbnail variants, subtitle/caption URL maps).
+import argparse
+import gc
+import tracemalloc
+
+from video_meta import VideoMeta
+
+LANGUAGES = [f"l{i:02d}" for i in range(100)] + ["en", "hi"]
+SUBTITLE_EXTS = ["json3", "srv1", "srv2", "srv3", "ttml", "vtt"]
+
+
+def fake_info_dict(n: int) -> dict:
+    video_id = f"vid{n:08d}"
+    headers = {
+        "User-Agent": "Mozilla/5.0 (X11; Linux x86_64) AppleWebKit/537.36 Chrome/120.0",
+        "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",
+        "Accept-Language": "en-us,en;q=0.5",
+        "Sec-Fetch-Mode": "navigate",
+    }
+    formats = [
+        {
+            "format_id": str(100 + i),
+            "url": f"https://rr1---sn-abc.googlevideo.com/videoplayback?id={video_id}&itag={i}&"
+            + "x" * 600,
+            "ext": "mp4",
+            "width": 1920,
+            "height": 1080,
+            "tbr": 1234.5,
+            "http_headers": dict(headers),
+            "fragments": [
+                {"url": f"sq/{j}", "duration": 5.0} for j in range(20 if i % 4 == 0 else 0)
+            ],
+        }
+        for i in range(60)
+    ]
+    thumbnails = [
+        {
+            "id": f"{i}{'maxresdefault' if i == 39 else ''}",
+            "url": f"https://i.ytimg.com/vi/{video_id}/{i}.jpg?sqp=" + "y" * 80,
+            "width": 1280,
+            "height": 720,
+        }
+        for i in range(40)
+    ]
+
+    def caption_map(kind: str) -> dict:
+        return {
+            lang: [
+                {
+                    "ext": ext,
+                    "url": f"https://www.youtube.com/api/timedtext?v={video_id}&lang={lang}&fmt={ext}&{kind}&"
+                    + "z" * 300,
+                    "name": lang,
+                }
+                for ext in SUBTITLE_EXTS
+            ]
+            for lang in LANGUAGES
+        }
+
+    return {
+        "id": video_id,
+        "title": f"Video {n}",
+        "webpage_url": f"https://www.youtube.com/watch?v={video_id}",
+        "description": "A fairly long description. " * 60,
+        "uploader": "Some Channel",
+        "duration": 1234,
+        "formats": formats,
+        "requested_formats": formats[-2:],
+        "thumbnails": thumbnails,
+        "subtitles": {"en": caption_map("manual")["en"]},
+        "automatic_captions": caption_map("asr"),
+        "http_headers": dict(headers),
+        "tags": [f"tag{i}" for i in range(30)],
+    }
+
+
+def retained_bytes(build, count: int) -> int:
+    gc.collect()
+    tracemalloc.start()
+    kept = [build(i) for i in range(count)]
+    gc.collect()
+    current, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del kept
+    return current
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--videos", type=int, default=50)
+    args = parser.parse_args()
+
+    full = retained_bytes(fake_info_dict, args.videos)
+    lean = retained_bytes(lambda i: VideoMeta.from_info_dict(fake_info_dict(i)), args.videos)
+
+    print(f"In-flight videos: {args.videos}")
+    print(f"{'record':<22}{'total KB':>12}{'KB / video':>14}")
+    for name, size in (("full info dict", full), ("VideoMeta", lean)):
+        print(f"{name:<22}{size / 1024:>12.1f}{size / 1024 / args.videos:>14.2f}")
+    print(f"Reduction: {full / max(lean, 1):.0f}x")
+
+
+if __name__ == "__main__":
+    main()
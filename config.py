@@ -19,3 +19,76 @@ OLLAMA_ENDPOINT = "http://localhost:11434/api/generate"
 # These settings are used when running the app with a production server.
 GUNICORN_WORKERS = 4  # Number of worker processes
 GUNICORN_BIND_ADDR = "0.0.0.0:8000"  # Address to bind to
+
+# --- Retry & Circuit Breaker Settings ---
+# Transient YouTube/Gemini failures are retried with exponential backoff and jitter.
+RETRY_MAX_ATTEMPTS = 4  # Attempts per external call, including the first one
+RETRY_BASE_DELAY = 2.0  # Seconds; doubled on every retry
+RETRY_MAX_DELAY = 120.0  # Upper bound for a single backoff sleep
+# After this many consecutive retryable failures a service's circuit opens and
+# the batch scheduler pauses instead of burning through the queue.
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN_SECONDS = 300
+# How many times the scheduler re-queues a batch item before marking it failed.
+MAX_ITEM_ATTEMPTS = 5
+
+# --- Incremental Sync Settings ---
+# Followed playlists and channels are re-listed on this schedule and only new
+# videos are enriched.
+SYNC_DEFAULT_INTERVAL_HOURS = 24
+SYNC_CHECK_INTERVAL_SECONDS = 600  # How often the server looks for due syncs
+
+# --- Model Routing ---
+# Each Gemini call is routed by item type ("video", "webpage" or "file") and by
+# the length of the item's full content. Rules are tried in order; the first
+# whose `types` include the item type (any type when omitted) and whose
+# `max_chars` is not exceeded (no limit when None) wins. A rule's
+# `max_input_chars` caps how much of the content is then sent. Short inputs
+# skip thinking entirely; long transcripts get the more capable model.
+MODEL_ROUTES = [
+    {"name": "short", "max_chars": 2000, "model": "gemini-2.5-flash-lite", "thinking_budget": 0},
+    # Scraped page text is mostly navigation and boilerplate, so a long page
+    # is not a harder page: keep it on the cheap model and send the start.
+    {
+        "name": "webpage",
+        "types": ("webpage",),
+        "max_chars": None,
+        "model": "gemini-2.5-flash-lite",
+        "thinking_budget": 1024,
+        "max_input_chars": 20000,
+    },
+    {"name": "medium", "max_chars": 20000, "model": "gemini-2.5-flash-lite", "thinking_budget": 1024},
+    # Long documents get the capable model, but only their first pages.
+    {
+        "name": "long-file",
+        "types": ("file",),
+        "max_chars": None,
+        "model": "gemini-2.5-flash",
+        "thinking_budget": 2048,
+        "max_input_chars": 32000,
+        "fallback_model": "gemini-2.5-flash-lite",
+    },
+    {
+        "name": "long",
+        "max_chars": None,
+        "model": "gemini-2.5-flash",
+        "thinking_budget": 4096,
+        "fallback_model": "gemini-2.5-flash-lite",
+    },
+]
+# Tried once more when the routed model fails (unless a rule sets its own).
+FALLBACK_MODEL = "gemini-2.5-flash"
+
+# --- Profiling ---
+# Set ENRICH_PROFILE=1 to write a cProfile file per enriched item and per /api/*
+# request (single requests can opt in with ?profile=1 instead).
+PROFILE_ENV_VAR = "ENRICH_PROFILE"
+PROFILE_DIR = "profiles"
+PROFILE_RETENTION = 200  # Newest profile files kept; older ones are deleted
+
+# --- Response Compression ---
+# JSON, HTML and log-stream responses are gzip- or brotli-compressed when the
+# client accepts it (brotli needs the optional `brotli` package).
+COMPRESSION_MIN_SIZE = 1024  # Bytes; smaller bodies are sent as-is
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4  # 0-11; higher is smaller but much slower for dynamic responses
@@ -17,6 +17,14 @@ from google import genai
 from google.genai import types
 from pydantic import BaseModel
 import config
+import facets
+import jobs
+import profiling
+import resilience
+import routing
+import sync
+import urls
+from video_meta import VideoMeta
 import time
 import random
 from constants import API_KEY
@@ -41,9 +49,7 @@ client = genai.Client(api_key=API_KEY)
 # gen_config = types.GenerateContentConfig(tools=[grounding_tool])
 # gen_config.response_schema = VideoData
 
-gen_config = types.GenerateContentConfig(
-    thinking_config=types.ThinkingConfig(thinking_budget=4096)
-)
+# Model and thinking budget are chosen per item; see routing.py.
 
 
 # --- Database Functions ---
@@ -70,6 +76,10 @@ def setup_database():
         )"""
     )
     conn.commit()
+    urls.setup_url_keys(conn)
+    facets.setup_facet_tables(conn)
+    jobs.setup_jobs_tables(conn)
+    sync.setup_sync_tables(conn)
     return conn
 
 
@@ -79,11 +89,19 @@ def save_video_to_db(
     print(
         f"  -> STEP 4: Saving enriched data for '{video_data['name']}'...", flush=True
     )
+    # Upsert rather than INSERT OR REPLACE so the row keeps its id (and its tag links).
     sql = """
-        INSERT OR REPLACE INTO videos 
-        (name, url, type, summary, tags, category, thumbnail_url, uploader, duration, processed_at, playlist_id) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT INTO videos 
+        (name, url, url_key, type, summary, tags, category, thumbnail_url, uploader, duration, processed_at, playlist_id) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET
+            name = excluded.name, url_key = excluded.url_key, type = excluded.type,
+            summary = excluded.summary, tags = excluded.tags, category = excluded.category,
+            thumbnail_url = excluded.thumbnail_url, uploader = excluded.uploader,
+            duration = excluded.duration, processed_at = excluded.processed_at,
+            playlist_id = excluded.playlist_id
     """
+    tags = facets.parse_tags(video_data["tags"])
     try:
         cursor = conn.cursor()
         cursor.execute(
@@ -91,10 +109,11 @@ def save_video_to_db(
             (
                 video_data["name"],
                 video_data["url"],
+                urls.canonical_url_key(video_data["url"]),
                 video_data["type"],
                 video_data["summary"],
-                video_data["tags"],
-                video_data["category"],
+                ", ".join(tags),
+                facets.normalize_category(video_data["category"]),
                 video_data["thumbnail_url"],
                 video_data["uploader"],
                 video_data["duration"],
@@ -102,22 +121,83 @@ def save_video_to_db(
                 playlist_id,
             ),
         )
+        video_id = cursor.execute(
+            "SELECT id FROM videos WHERE url = ?", (video_data["url"],)
+        ).fetchone()[0]
+        facets.set_video_tags(conn, video_id, tags, commit=False)
         conn.commit()
         print("  -> SUCCESS: Data saved.", flush=True)
+        return True
     except sqlite3.Error as e:
+        conn.rollback()
         print(
             f"ERROR: Could not save video to database: {e}", file=sys.stderr, flush=True
         )
+        return False
 
 
 # --- Core Functions ---
-def get_video_transcript(video_id: str, video_info: dict) -> str:
+def fetch_subtitle_content(video: VideoMeta):
+    """
+    Returns the raw TTML of the video's subtitles, or None. Uses the track selected
+    at extraction time when there is one; otherwise lets yt-dlp download the file.
+    """
+    video_id = video.id
+    track = video.subtitle
+    if track and track.ext == "ttml":
+        print(
+            f"      -> Fetching '{track.language}' subtitle track selected at extraction...",
+            flush=True,
+        )
+        response = requests.get(track.url, timeout=15)
+        response.raise_for_status()
+        return response.text
+
+    ydl_opts = {
+        "writesubtitles": True,
+        "writeautomaticsub": True,
+        "subtitleslangs": ["en", "hi"],
+        "skip_download": True,
+        "outtmpl": f"{video_id}",  # Use video_id for predictable filename
+        "subtitlesformat": "ttml",
+        "quiet": True,
+        "noplaylist": True,
+    }
+
+    with YoutubeDL(ydl_opts) as ydl:
+        ydl.download([f"https://www.youtube.com/watch?v={video_id}"])
+
+    subtitle_file = None
+    for lang in ["en", "hi"]:
+        potential_file = f"{video_id}.{lang}.ttml"
+        if os.path.exists(potential_file):
+            subtitle_file = potential_file
+            break
+
+    if not subtitle_file:
+        print(
+            "      -> yt-dlp fallback failed: No subtitle file was downloaded.",
+            file=sys.stderr,
+            flush=True,
+        )
+        return None
+
+    print(f"      -> Found subtitle file: {subtitle_file}", flush=True)
+    with open(subtitle_file, "r", encoding="utf-8") as f:
+        content = f.read()
+
+    os.remove(subtitle_file)
+    return content
+
+
+def get_video_transcript(video: VideoMeta) -> str:
     """
-    Fetches transcript. First tries youtube_transcript_api, falls back to yt-dlp.
+    Fetches transcript. First tries youtube_transcript_api (currently disabled), then
+    the subtitle track selected at extraction, then a yt-dlp subtitle download.
     If using fallback, it prepends the video description to the transcript.
     """
-    video_id = video_info.get("id", "")
-    description = video_info.get("description", "")
+    video_id = video.id
+    description = video.description
     print(
         f"    - Sub-step 3.1: Fetching transcript for video ID: {video_id}...",
         flush=True,
@@ -161,85 +241,80 @@ def get_video_transcript(video_id: str, video_info: dict) -> str:
             file=sys.stderr,
             flush=True,
         )
-        print(f"      -> Attempting fallback using yt-dlp...", flush=True)
 
-        # --- Fallback Method: yt-dlp ---
-        try:
-            ydl_opts = {
-                "writesubtitles": True,
-                "writeautomaticsub": True,
-                "subtitleslangs": ["en", "hi"],
-                "skip_download": True,
-                "outtmpl": f"{video_id}",  # Use video_id for predictable filename
-                "subtitlesformat": "ttml",
-                "quiet": True,
-                "noplaylist": True,
-            }
-
-            with YoutubeDL(ydl_opts) as ydl:
-                ydl.download([f"https://www.youtube.com/watch?v={video_id}"])
-
-            subtitle_file = None
-            for lang in ["en", "hi"]:
-                potential_file = f"{video_id}.{lang}.ttml"
-                if os.path.exists(potential_file):
-                    subtitle_file = potential_file
-                    break
-
-            if not subtitle_file:
-                print(
-                    "      -> yt-dlp fallback failed: No subtitle file was downloaded.",
-                    file=sys.stderr,
-                    flush=True,
-                )
-                return ""
-
-            print(f"      -> Found subtitle file: {subtitle_file}", flush=True)
-            with open(subtitle_file, "r", encoding="utf-8") as f:
-                content = f.read()
+    # --- Fallback Method: selected subtitle track, else yt-dlp ---
+    # Runs whenever the primary method did not return a transcript.
+    print(f"      -> Attempting fallback using subtitle tracks...", flush=True)
+    try:
+        content = fetch_subtitle_content(video)
+        if content is None:
+            return ""
 
-            os.remove(subtitle_file)
+        text_parts = re.findall(r">([^<]+)</p>", content)
+        full_transcript = " ".join(
+            part.strip().replace("\n", " ") for part in text_parts
+        )
 
-            text_parts = re.findall(r">([^<]+)</p>", content)
-            full_transcript = " ".join(
-                part.strip().replace("\n", " ") for part in text_parts
+        if full_transcript:
+            print(
+                "      -> Transcript extracted successfully via subtitle fallback.",
+                flush=True,
             )
-
-            if full_transcript:
-                print(
-                    "      -> Transcript extracted successfully via yt-dlp fallback.",
-                    flush=True,
-                )
-                # --- MODIFICATION: Prepend description to the transcript ---
-                return f"Video Description:\n{description}\n\nTranscript:\n{full_transcript}"
-            elif description:
-                print(
-                    "      -> No transcript found, but description is available. Returning description.",
-                    flush=True,
-                )
-                return f"Video Description:\n{description}\n\nTranscript: No transcript available."
-            else:
-                print(
-                    "      -> No transcript or description available.",
-                    flush=True,
-                )
-                return ""
-
-        except Exception as ydl_error:
+            # --- MODIFICATION: Prepend description to the transcript ---
+            return f"Video Description:\n{description}\n\nTranscript:\n{full_transcript}"
+        elif description:
             print(
-                f"      -> yt-dlp fallback also failed: {ydl_error}",
-                file=sys.stderr,
+                "      -> No transcript found, but description is available. Returning description.",
+                flush=True,
+            )
+            return f"Video Description:\n{description}\n\nTranscript: No transcript available."
+        else:
+            print(
+                "      -> No transcript or description available.",
                 flush=True,
             )
             return ""
 
+    except Exception as ydl_error:
+        print(
+            f"      -> Subtitle fallback also failed: {ydl_error}",
+            file=sys.stderr,
+            flush=True,
+        )
+        return ""
+
+
+def generate_with_route(route: routing.Route, model: str, prompt: str, fallback: bool = False):
+    """Calls Gemini with the route's thinking budget, retrying transient failures."""
+    gen_config = types.GenerateContentConfig(
+        thinking_config=types.ThinkingConfig(thinking_budget=route.thinking_budget)
+    )
+    return resilience.call_with_retry(
+        resilience.GEMINI,
+        routing.timed_call,
+        route,
+        model,
+        lambda: client.models.generate_content(
+            model=model, config=gen_config, contents=prompt
+        ),
+        fallback,
+    )
+
 
 def get_enriched_data_from_gemini(
-    title: str, description: str, transcript: str, model_name: str
+    title: str,
+    description: str,
+    transcript: str,
+    model_name: str = None,
+    item_type: str = "video",
 ) -> dict:
     """
     Calls the Gemini API to get a structured JSON object containing summary, tags, and category.
-    Handles malformed responses robustly.
+    The model and thinking budget are routed by item type and the full content length
+    (model_name pins the model), and the content is then cut to the route's max_input_chars;
+    if the routed model fails, the route's fallback is tried once.
+    Raises resilience.RetryableError for rate limits, outages and malformed responses,
+    and resilience.TerminalError for requests that can never succeed.
     """
     print(f"    - Sub-step 3.2: Calling Gemini API for structured data...", flush=True)
     context = transcript if transcript else description
@@ -250,109 +325,109 @@ def get_enriched_data_from_gemini(
             "category": "Uncategorized",
         }
 
+    route = routing.choose_route(item_type, len(context), model_name)
+    if route.max_input_chars:
+        context = context[: route.max_input_chars]
+
     prompt = f"""
 You are an expert YouTube video metadata enrichment agent and cataloger. Analyze the provided video title and content and return output for a cataloging system. Output a JSON object with:
 - summary: A concise one-sentence summary.
 - tags: A list of up to 7 specific, informative tags.
-- category: The most relevant YouTube category.
+- category: The most relevant YouTube category, exactly one of: {', '.join(facets.CATEGORIES)}.
 
 Video Title: {title}
 Video Content:
 {context}
 """
 
+    print(
+        f"      -> Route '{route.name}': {route.model} (thinking budget {route.thinking_budget})",
+        flush=True,
+    )
     try:
-        response = client.models.generate_content(
-            model=model_name,
-            config=gen_config,
-            contents=prompt,
-        )
-        print("Output Response", response.text)
-
-        # Try to extract JSON from code blocks, markdown, or plain text
-        text = response.text.strip()
-        # Remove markdown code block markers if present
-        if text.startswith("```") and text.endswith("```"):
-            text = text.strip("`").strip()
-            # Remove possible language hint (e.g., ```json)
-            text = re.sub(r"^json\n", "", text, flags=re.IGNORECASE)
-
-        # Try to find the first {...} JSON object in the text
-        match = re.search(r"\{.*\}", text, re.DOTALL)
-        if match:
-            json_str = match.group(0)
-        else:
-            json_str = text  # fallback: try to parse the whole text
-
-        try:
-            response_data = json.loads(json_str)
-        except Exception as e:
-            print(f"      -> ERROR: Failed to parse JSON: {e}", flush=True)
-            return {"summary": "Error", "tags": "Error", "category": "Error"}
-
-        summary = response_data.get("summary", "No summary provided.")
-        tags = response_data.get("tags", [])
-        # Accept tags as either a list or comma-separated string
-        if isinstance(tags, list):
-            tags_str = ", ".join(str(t).strip() for t in tags)
-        elif isinstance(tags, str):
-            tags_str = tags
-        else:
-            tags_str = ""
-        category = response_data.get("category", "Uncategorized")
+        response_data = parse_gemini_response(generate_with_route(route, route.model, prompt))
+    except resilience.CircuitOpenError:
+        raise
+    except (resilience.RetryableError, resilience.TerminalError) as e:
+        if not route.fallback_model:
+            raise
         print(
-            "      -> Successfully received and parsed structured data from Gemini.",
+            f"      -> {route.model} failed ({e}); falling back to {route.fallback_model}...",
             flush=True,
         )
-        return {"summary": summary, "tags": tags_str, "category": category}
+        response = generate_with_route(route, route.fallback_model, prompt, fallback=True)
+        response_data = parse_gemini_response(response)
+
+    summary = response_data.get("summary", "No summary provided.")
+    tags = response_data.get("tags", [])
+    # Accept tags as either a list or comma-separated string
+    if isinstance(tags, list):
+        tags_str = ", ".join(str(t).strip() for t in tags)
+    elif isinstance(tags, str):
+        tags_str = tags
+    else:
+        tags_str = ""
+    category = response_data.get("category", "Uncategorized")
+    print(
+        "      -> Successfully received and parsed structured data from Gemini.",
+        flush=True,
+    )
+    return {"summary": summary, "tags": tags_str, "category": category}
+
+
+def parse_gemini_response(response) -> dict:
+    """Extracts the JSON object from a Gemini response; malformed output is retryable."""
+    print("Output Response", response.text)
+
+    # Try to extract JSON from code blocks, markdown, or plain text
+    text = (response.text or "").strip()
+    # Remove markdown code block markers if present
+    if text.startswith("```") and text.endswith("```"):
+        text = text.strip("`").strip()
+        # Remove possible language hint (e.g., ```json)
+        text = re.sub(r"^json\n", "", text, flags=re.IGNORECASE)
+
+    # Try to find the first {...} JSON object in the text
+    match = re.search(r"\{.*\}", text, re.DOTALL)
+    if match:
+        json_str = match.group(0)
+    else:
+        json_str = text  # fallback: try to parse the whole text
 
+    try:
+        response_data = json.loads(json_str)
+        if not isinstance(response_data, dict):
+            raise ValueError(f"expected a JSON object, got {type(response_data).__name__}")
     except Exception as e:
-        print(f"      -> ERROR calling Gemini API: {e}", flush=True)
-        return {"summary": "Error", "tags": "Error", "category": "Error"}
-
-
-def process_video(video_info: dict, ai_model: str) -> dict:
-    video_id = video_info.get("id", "")
-    title = video_info.get("title", "No Title")
-    url = video_info.get("webpage_url", "")
-    description = video_info.get("description", "")
-
-    thumbnail_url = video_info.get("thumbnail")
-    if not thumbnail_url:
-        thumbnails = video_info.get("thumbnails", [])
-        if thumbnails:
-            hq_thumb = next(
-                (t["url"] for t in thumbnails if "hqdefault" in t.get("id", "")), None
-            )
-            maxres_thumb = next(
-                (t["url"] for t in thumbnails if "maxresdefault" in t.get("id", "")),
-                None,
-            )
-            thumbnail_url = maxres_thumb or hq_thumb or thumbnails[-1]["url"]
-        else:
-            thumbnail_url = f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+        print(f"      -> ERROR: Failed to parse JSON: {e}", flush=True)
+        raise resilience.RetryableError(f"Gemini returned malformed JSON: {e}")
+    return response_data
 
-    print(f"PROCESSING_URL::{url}", flush=True)
-    print(f"\nSTEP 3: Processing Video: '{title}'", flush=True)
 
-    transcript = get_video_transcript(video_id, video_info)
+@profiling.profiled("video", label=lambda video: video.id)
+def process_video(video: VideoMeta, ai_model: str) -> dict:
+    print(f"PROCESSING_URL::{video.webpage_url}", flush=True)
+    print(f"\nSTEP 3: Processing Video: '{video.title}'", flush=True)
+
+    transcript = get_video_transcript(video)
     enriched_data = get_enriched_data_from_gemini(
-        title, description, transcript, ai_model
+        video.title, video.description, transcript, ai_model
     )
 
     return {
-        "name": title,
-        "url": url,
+        "name": video.title,
+        "url": video.webpage_url,
         "type": "video",
         "summary": enriched_data["summary"],
         "tags": enriched_data["tags"],
         "category": enriched_data["category"],
-        "thumbnail_url": thumbnail_url,
-        "uploader": video_info.get("uploader", "Unknown Uploader"),
-        "duration": video_info.get("duration", 0),
+        "thumbnail_url": video.thumbnail_url,
+        "uploader": video.uploader,
+        "duration": video.duration,
     }
 
 
+@profiling.profiled("webpage")
 def process_webpage(url: str, ai_model: str) -> dict:
     print(f"PROCESSING_URL::{url}", flush=True)
     print(f"\nSTEP 3: Processing Webpage: '{url}'", flush=True)
@@ -374,7 +449,11 @@ def process_webpage(url: str, ai_model: str) -> dict:
         text = soup.get_text(separator=" ", strip=True)
 
         enriched_data = get_enriched_data_from_gemini(
-            title, description="This is webpage", transcript=text, model_name=ai_model
+            title,
+            description="This is webpage",
+            transcript=text,
+            model_name=ai_model,
+            item_type="webpage",
         )
 
         return {
@@ -388,6 +467,8 @@ def process_webpage(url: str, ai_model: str) -> dict:
             "uploader": None,
             "duration": 100000000,
         }
+    except resilience.RetryableError:
+        raise
     except Exception as e:
         print(f"ERROR processing webpage {url}: {e}", file=sys.stderr, flush=True)
         return None
@@ -412,6 +493,7 @@ def get_text_from_pdf(file_path: str) -> str:
         return ""
 
 
+@profiling.profiled("file", label=os.path.basename)
 def process_file(file_path: str, ai_model: str) -> dict:
     """Processes a local file (e.g., PDF) for enrichment."""
     filename = os.path.basename(file_path)
@@ -442,8 +524,9 @@ def process_file(file_path: str, ai_model: str) -> dict:
     enriched_data = get_enriched_data_from_gemini(
         title=filename,
         description="This is a pdf file",
-        transcript=text_content[:4000],
+        transcript=text_content,
         model_name=ai_model,
+        item_type="file",
     )
 
     return {
@@ -459,19 +542,257 @@ def process_file(file_path: str, ai_model: str) -> dict:
     }
 
 
+def extract_youtube_info(url: str, ydl_opts: dict) -> dict:
+    """Runs yt-dlp metadata extraction with retries and circuit breaking."""
+
+    def extract():
+        with YoutubeDL(ydl_opts) as ydl:
+            return ydl.extract_info(url, download=False)
+
+    return resilience.call_with_retry(resilience.YOUTUBE, extract)
+
+
+def extract_video_meta(url: str) -> VideoMeta:
+    """
+    Extracts a single video and immediately projects it to a compact VideoMeta,
+    so the full yt-dlp info dict is freed before transcript and LLM work starts.
+    """
+
+    def extract():
+        with YoutubeDL({"quiet": True, "noplaylist": True}) as ydl:
+            return VideoMeta.from_info_dict(ydl.extract_info(url, download=False))
+
+    return resilience.call_with_retry(resilience.YOUTUBE, extract)
+
+
+def run_and_save(db_conn, process_func, target: str, ai_model: str) -> int:
+    """Processes a webpage or file and saves it. Returns the enricher exit code."""
+    try:
+        enriched_data = process_func(target, ai_model)
+    except resilience.RetryableError as e:
+        print(f"ERROR processing {target} (will retry): {e}", file=sys.stderr, flush=True)
+        return resilience.EXIT_RETRY
+    except resilience.TerminalError as e:
+        print(f"ERROR processing {target}: {e}", file=sys.stderr, flush=True)
+        return 1
+    if enriched_data and save_video_to_db(db_conn, enriched_data):
+        return 0
+    return 1
+
+
+def fetch_flat_listing(url: str) -> dict:
+    """Cheap flat listing of a playlist or channel (entry ids and URLs only)."""
+    return extract_youtube_info(url, {"quiet": True, "extract_flat": True})
+
+
+def listing_failure_code(error: Exception) -> int:
+    print(
+        f"FATAL: yt-dlp failed to extract playlist info: {error}",
+        file=sys.stderr,
+        flush=True,
+    )
+    return resilience.EXIT_RETRY if isinstance(error, resilience.RetryableError) else 1
+
+
+def upsert_playlist(db_conn, info_dict: dict, fallback_url: str, touch: bool = True) -> int:
+    """
+    Creates or updates a playlist row, keeping its id stable so its videos stay linked.
+    With touch=False an existing row keeps its processed_at (syncs bump it only when
+    they add videos, so idle followed playlists do not jump to the top of the library).
+    """
+    playlist_url = info_dict.get("webpage_url") or fallback_url
+    touched = ", processed_at = excluded.processed_at" if touch else ""
+    cursor = db_conn.cursor()
+    cursor.execute(
+        f"""
+        INSERT INTO playlists (title, url, url_key, uploader, video_count, processed_at)
+        VALUES (?, ?, ?, ?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET
+            title = excluded.title, url_key = excluded.url_key, uploader = excluded.uploader,
+            video_count = excluded.video_count{touched}
+        """,
+        (
+            info_dict.get("title", "Untitled Playlist"),
+            playlist_url,
+            urls.canonical_url_key(playlist_url),
+            info_dict.get("uploader") or info_dict.get("channel"),
+            info_dict.get("playlist_count"),
+            datetime.now(),
+        ),
+    )
+    db_conn.commit()
+    playlist_id = cursor.execute(
+        "SELECT id FROM playlists WHERE url = ?", (playlist_url,)
+    ).fetchone()[0]
+    print(f" -> Created/Updated playlist entry with ID: {playlist_id}", flush=True)
+    return playlist_id
+
+
+def process_playlist_entries(
+    db_conn, scope: str, video_urls: list, playlist_id: int, ai_model: str
+) -> dict:
+    """
+    Enriches each video URL, checkpointing progress under `scope` so an interrupted
+    walk resumes where it stopped. Returns the scope's checkpoint counts.
+    """
+    jobs.enqueue_items(db_conn, scope, video_urls)
+    processed_any = False
+    for i, video_url in enumerate(video_urls):
+        if jobs.get_status(db_conn, scope, video_url) == jobs.DONE:
+            print(
+                f" -> Skipping video {i+1} of {len(video_urls)} (already processed in an earlier run).",
+                flush=True,
+            )
+            continue
+        if processed_any:
+            time.sleep(random.uniform(2.0, 5.0))
+        processed_any = True
+        print(f"\n--- Processing video {i+1} of {len(video_urls)} ---", flush=True)
+        jobs.mark_running(db_conn, scope, video_url)
+        try:
+            video = extract_video_meta(video_url)
+            enriched_data = process_video(video, ai_model)
+            if not save_video_to_db(db_conn, enriched_data, playlist_id):
+                raise RuntimeError("database save failed")
+            jobs.mark_done(db_conn, scope, video_url)
+        except resilience.RetryableError as e:
+            jobs.mark_pending(db_conn, scope, video_url, str(e))
+            print(
+                f"ERROR processing video {video_url} (will retry): {e}",
+                file=sys.stderr,
+                flush=True,
+            )
+            if isinstance(e, resilience.CircuitOpenError):
+                print(
+                    " -> Service unavailable; pausing playlist until the scheduler retries it.",
+                    flush=True,
+                )
+                break
+        except Exception as e:
+            jobs.mark_failed(db_conn, scope, video_url, str(e))
+            print(f"ERROR processing video {video_url}: {e}", file=sys.stderr, flush=True)
+    return jobs.count_items(db_conn, scope)
+
+
+def unfinished_count(counts: dict) -> int:
+    return counts.get(jobs.PENDING, 0) + counts.get(jobs.RUNNING, 0)
+
+
+def process_playlist(db_conn, url: str, ai_model: str) -> int:
+    """Enriches every video of a playlist. Returns the enricher exit code."""
+    print(" -> Playlist URL detected. Fetching playlist entries...", flush=True)
+    try:
+        info_dict = fetch_flat_listing(url)
+    except Exception as e:
+        return listing_failure_code(e)
+    playlist_id = upsert_playlist(db_conn, info_dict, url)
+
+    video_urls = [
+        entry["url"]
+        for entry in info_dict.get("entries") or []
+        if entry and entry.get("url")
+    ]
+    scope = f"{jobs.PLAYLIST_PREFIX}{info_dict.get('webpage_url') or url}"
+    counts = process_playlist_entries(db_conn, scope, video_urls, playlist_id, ai_model)
+
+    if unfinished_count(counts):
+        print(
+            f" -> {unfinished_count(counts)} video(s) hit transient errors and are queued for retry.",
+            file=sys.stderr,
+            flush=True,
+        )
+        return resilience.EXIT_RETRY
+    if counts.get(jobs.FAILED):
+        print(
+            f" -> {counts[jobs.FAILED]} video(s) failed; they will be retried on the next run of this playlist.",
+            file=sys.stderr,
+            flush=True,
+        )
+        return 1
+    jobs.clear_scope(db_conn, scope)
+    return 0
+
+
+def sync_source(db_conn, url: str, ai_model: str) -> int:
+    """
+    Incrementally syncs a followed playlist or channel: diffs a flat listing against
+    the entry ids seen before and enriches only the new videos. Returns the exit code.
+    """
+    print(f" -> Syncing {url}. Fetching flat listing...", flush=True)
+    source = sync.get_source(db_conn, url)
+    source_id = source[0] if source else sync.add_source(db_conn, url)
+    listing = sync.listing_url(url)
+    try:
+        info_dict = fetch_flat_listing(listing)
+    except Exception as e:
+        return listing_failure_code(e)
+    playlist_id = upsert_playlist(db_conn, info_dict, listing, touch=False)
+
+    entries = [
+        entry
+        for entry in info_dict.get("entries") or []
+        if entry and entry.get("id") and entry.get("url")
+    ]
+    seen = sync.seen_ids(db_conn, source_id)
+    unseen = [entry for entry in entries if entry["id"] not in seen]
+    # Videos already enriched elsewhere (e.g. added by URL) count as seen.
+    in_library = urls.find_existing_keys(
+        db_conn, [urls.canonical_url_key(entry["url"]) for entry in unseen]
+    )
+    known = [e for e in unseen if urls.canonical_url_key(e["url"]) in in_library]
+    sync.mark_seen(db_conn, source_id, [entry["id"] for entry in known])
+    new_entries = [e for e in unseen if urls.canonical_url_key(e["url"]) not in in_library]
+    print(
+        f" -> {len(entries)} entries listed, {len(new_entries)} new since the last sync.",
+        flush=True,
+    )
+
+    scope = f"{jobs.PLAYLIST_PREFIX}{listing}"
+    counts = process_playlist_entries(
+        db_conn, scope, [entry["url"] for entry in new_entries], playlist_id, ai_model
+    )
+    # Videos that failed permanently are marked seen too, so they are not retried every sync.
+    finished = set(jobs.items_with_status(db_conn, scope, (jobs.DONE, jobs.FAILED)))
+    sync.mark_seen(
+        db_conn, source_id, [e["id"] for e in new_entries if e["url"] in finished]
+    )
+    sync.record_sync(db_conn, source_id, playlist_id, counts.get(jobs.DONE, 0))
+
+    if unfinished_count(counts):
+        print(
+            f" -> {unfinished_count(counts)} video(s) hit transient errors and are queued for retry.",
+            file=sys.stderr,
+            flush=True,
+        )
+        return resilience.EXIT_RETRY
+    jobs.clear_scope(db_conn, scope)
+    return 0
+
+
 # --- Main Execution ---
 def main():
     parser = argparse.ArgumentParser()
     group = parser.add_mutually_exclusive_group(required=True)
     group.add_argument("--url", help="A YouTube or webpage URL to process.")
     group.add_argument("--file", help="The path to a local file to process.")
-    parser.add_argument("--model", default="gemini-2.5-flash-lite-preview-06-17")
+    group.add_argument(
+        "--sync",
+        help="A followed playlist or channel URL to sync; only new videos are enriched.",
+    )
+    parser.add_argument(
+        "--model",
+        help="Pin one Gemini model for every item instead of routing per item (config.MODEL_ROUTES).",
+    )
     args = parser.parse_args()
 
     ai_model = args.model
-    print(f"--- Enrichment Script Started (Model: {ai_model}) ---", flush=True)
+    print(
+        f"--- Enrichment Script Started (Model: {ai_model or 'routed per item'}) ---",
+        flush=True,
+    )
 
     db_conn = setup_database()
+    exit_code = 0
 
     if args.url:
         print(f"\nSTEP 2: Fetching metadata for URL: {args.url}", flush=True)
@@ -480,83 +801,16 @@ def main():
         if is_youtube_url:
             is_playlist = "playlist?list=" in args.url and "watch?v=" not in args.url
             if is_playlist:
-                ydl_opts = {"quiet": True, "extract_flat": True}
-                print(
-                    " -> Playlist URL detected. Fetching playlist entries...",
-                    flush=True,
-                )
-                try:
-                    with YoutubeDL(ydl_opts) as ydl:
-                        info_dict = ydl.extract_info(args.url, download=False)
-                except Exception as e:
-                    print(
-                        f"FATAL: yt-dlp failed to extract playlist info: {e}",
-                        file=sys.stderr,
-                        flush=True,
-                    )
-                    db_conn.close()
-                    sys.exit(1)
-
-                playlist_title = info_dict.get("title", "Untitled Playlist")
-                playlist_url = info_dict.get("webpage_url")
-                playlist_uploader = info_dict.get("uploader")
-                video_count = info_dict.get("playlist_count")
-
-                cursor = db_conn.cursor()
-                cursor.execute(
-                    "INSERT OR REPLACE INTO playlists (title, url, uploader, video_count, processed_at) VALUES (?, ?, ?, ?, ?)",
-                    (
-                        playlist_title,
-                        playlist_url,
-                        playlist_uploader,
-                        video_count,
-                        datetime.now(),
-                    ),
-                )
-                db_conn.commit()
-                playlist_id = cursor.lastrowid
-                print(
-                    f" -> Created/Updated playlist entry with ID: {playlist_id}",
-                    flush=True,
-                )
-
-                video_entries = info_dict.get("entries", [])
-                for i, entry in enumerate(video_entries):
-                    if i > 0:
-                        time.sleep(random.uniform(2.0, 5.0))
-                    print(
-                        f"\n--- Processing video {i+1} of {len(video_entries)} ---",
-                        flush=True,
-                    )
-                    try:
-                        video_url = entry.get("url")
-                        if not video_url:
-                            continue
-                        with YoutubeDL(
-                            {"quiet": True, "noplaylist": True}
-                        ) as ydl_video:
-                            video_details = ydl_video.extract_info(
-                                video_url, download=False
-                            )
-                        enriched_data = process_video(video_details, ai_model)
-                        save_video_to_db(db_conn, enriched_data, playlist_id)
-                    except Exception as e:
-                        print(
-                            f"ERROR processing video {entry.get('url')}: {e}",
-                            file=sys.stderr,
-                            flush=True,
-                        )
+                exit_code = process_playlist(db_conn, args.url, ai_model)
             else:
-                ydl_opts = {"quiet": True, "noplaylist": True}
                 print(f" -> Single video URL detected. Fetching details...", flush=True)
                 try:
-                    with YoutubeDL(ydl_opts) as ydl_video:
-                        video_details = ydl_video.extract_info(args.url, download=False)
+                    video = extract_video_meta(args.url)
 
-                    canonical_url = video_details.get("webpage_url")
                     cursor = db_conn.cursor()
                     cursor.execute(
-                        "SELECT playlist_id FROM videos WHERE url = ?", (canonical_url,)
+                        "SELECT playlist_id FROM videos WHERE url_key = ?",
+                        (urls.canonical_url_key(video.webpage_url),),
                     )
                     existing_record = cursor.fetchone()
                     existing_playlist_id = (
@@ -569,29 +823,40 @@ def main():
                             flush=True,
                         )
 
-                    enriched_data = process_video(video_details, ai_model)
-                    save_video_to_db(
+                    enriched_data = process_video(video, ai_model)
+                    if not save_video_to_db(
                         db_conn, enriched_data, playlist_id=existing_playlist_id
+                    ):
+                        exit_code = 1
+                except resilience.RetryableError as e:
+                    print(
+                        f"ERROR processing single video {args.url} (will retry): {e}",
+                        file=sys.stderr,
+                        flush=True,
                     )
+                    exit_code = resilience.EXIT_RETRY
                 except Exception as e:
                     print(
                         f"ERROR processing single video {args.url}: {e}",
                         file=sys.stderr,
                         flush=True,
                     )
+                    exit_code = 1
         else:
             # Process as a generic webpage
-            enriched_data = process_webpage(args.url, ai_model)
-            if enriched_data:
-                save_video_to_db(db_conn, enriched_data)
+            exit_code = run_and_save(db_conn, process_webpage, args.url, ai_model)
     elif args.file:
         # File processing logic
-        enriched_data = process_file(args.file, ai_model)
-        if enriched_data:
-            save_video_to_db(db_conn, enriched_data)
+        exit_code = run_and_save(db_conn, process_file, args.file, ai_model)
+    elif args.sync:
+        exit_code = sync_source(db_conn, args.sync, ai_model)
 
     db_conn.close()
     print("\n--- Enrichment Script Finished ---", flush=True)
+    # A non-zero exit tells the batch runner to checkpoint this item as failed,
+    # or with EXIT_RETRY, to re-queue it.
+    if exit_code:
+        sys.exit(exit_code)
 
 
 if __name__ == "__main__":
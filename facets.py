@@ -0,0 +1,294 @@
+# facets.py
+# Normalized tags and categories for browsing the library.
+# Tags are case-folded and deduplicated into `tags` / `video_tags`; categories
+# are mapped onto YouTube's fixed category list. Per-tag and per-category item
+# counts are kept up to date by SQLite triggers on every insert, update and
+# delete, so facet histograms never need a scan over `videos`.
+import re
+
+UNCATEGORIZED = "Uncategorized"
+CATEGORIES = [
+    "Film & Animation",
+    "Autos & Vehicles",
+    "Music",
+    "Pets & Animals",
+    "Sports",
+    "Travel & Events",
+    "Gaming",
+    "People & Blogs",
+    "Comedy",
+    "Entertainment",
+    "News & Politics",
+    "Howto & Style",
+    "Education",
+    "Science & Technology",
+    "Nonprofits & Activism",
+    UNCATEGORIZED,
+]
+CATEGORY_ALIASES = {
+    "film": "Film & Animation",
+    "films": "Film & Animation",
+    "animation": "Film & Animation",
+    "movies": "Film & Animation",
+    "autos": "Autos & Vehicles",
+    "cars": "Autos & Vehicles",
+    "vehicles": "Autos & Vehicles",
+    "automotive": "Autos & Vehicles",
+    "pets": "Pets & Animals",
+    "animals": "Pets & Animals",
+    "sport": "Sports",
+    "fitness": "Sports",
+    "travel": "Travel & Events",
+    "events": "Travel & Events",
+    "games": "Gaming",
+    "game": "Gaming",
+    "vlog": "People & Blogs",
+    "vlogs": "People & Blogs",
+    "blogs": "People & Blogs",
+    "people": "People & Blogs",
+    "humor": "Comedy",
+    "humour": "Comedy",
+    "news": "News & Politics",
+    "politics": "News & Politics",
+    "howto": "Howto & Style",
+    "diy": "Howto & Style",
+    "style": "Howto & Style",
+    "fashion": "Howto & Style",
+    "beauty": "Howto & Style",
+    "cooking": "Howto & Style",
+    "educational": "Education",
+    "tutorial": "Education",
+    "tutorials": "Education",
+    "learning": "Education",
+    "lecture": "Education",
+    "science": "Science & Technology",
+    "technology": "Science & Technology",
+    "tech": "Science & Technology",
+    "programming": "Science & Technology",
+    "software": "Science & Technology",
+    "engineering": "Science & Technology",
+    "nonprofits": "Nonprofits & Activism",
+    "nonprofit": "Nonprofits & Activism",
+    "activism": "Nonprofits & Activism",
+}
+_CATEGORY_LOOKUP = {c.casefold(): c for c in CATEGORIES}
+
+
+def normalize_category(raw) -> str:
+    """Maps a free-form category onto the fixed vocabulary."""
+    text = " ".join(str(raw or "").split()).casefold()
+    if text in _CATEGORY_LOOKUP:
+        return _CATEGORY_LOOKUP[text]
+    for word in re.split(r"[^a-z0-9]+", text.replace("how to", "howto")):
+        if word in CATEGORY_ALIASES:
+            return CATEGORY_ALIASES[word]
+        if word and word != "and":
+            for category in CATEGORIES:
+                if word in re.split(r"[^a-z0-9]+", category.casefold()):
+                    return category
+    return UNCATEGORIZED
+
+
+def parse_tags(tags) -> list:
+    """
+    Splits a comma-separated string (or list) into display tags, deduplicated
+    case-insensitively in first-seen order.
+    """
+    if isinstance(tags, str):
+        tags = tags.split(",")
+    seen = {}
+    for tag in tags or []:
+        display = " ".join(str(tag).split()).lstrip("#").strip()
+        key = display.casefold()
+        if key and key not in seen:
+            seen[key] = display
+    return list(seen.values())
+
+
+# --- Schema ---
+def setup_facet_tables(conn):
+    """Creates the facet tables and triggers; backfills them the first time."""
+    is_new = not conn.execute(
+        "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'video_tags'"
+    ).fetchone()
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS tags (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, name TEXT NOT NULL UNIQUE,
+            display_name TEXT NOT NULL, item_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE TABLE IF NOT EXISTS video_tags (
+            video_id INTEGER NOT NULL, tag_id INTEGER NOT NULL,
+            PRIMARY KEY (video_id, tag_id),
+            FOREIGN KEY (video_id) REFERENCES videos (id),
+            FOREIGN KEY (tag_id) REFERENCES tags (id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_video_tags_tag ON video_tags (tag_id, video_id);
+        CREATE INDEX IF NOT EXISTS idx_tags_count ON tags (item_count DESC);
+        CREATE TABLE IF NOT EXISTS category_counts (
+            category TEXT PRIMARY KEY, item_count INTEGER NOT NULL DEFAULT 0
+        );
+        CREATE INDEX IF NOT EXISTS idx_videos_category ON videos (category, processed_at);
+        -- Unfiltered and tag-only browsing pages by recency.
+        CREATE INDEX IF NOT EXISTS idx_videos_processed_at ON videos (processed_at);
+
+        CREATE TRIGGER IF NOT EXISTS trg_video_tags_insert AFTER INSERT ON video_tags BEGIN
+            UPDATE tags SET item_count = item_count + 1 WHERE id = NEW.tag_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_video_tags_delete AFTER DELETE ON video_tags BEGIN
+            UPDATE tags SET item_count = item_count - 1 WHERE id = OLD.tag_id;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_videos_category_insert AFTER INSERT ON videos BEGIN
+            INSERT INTO category_counts (category, item_count)
+            VALUES (COALESCE(NEW.category, 'Uncategorized'), 1)
+            ON CONFLICT(category) DO UPDATE SET item_count = item_count + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_videos_category_update AFTER UPDATE OF category ON videos
+        WHEN COALESCE(OLD.category, '') != COALESCE(NEW.category, '') BEGIN
+            UPDATE category_counts SET item_count = item_count - 1
+            WHERE category = COALESCE(OLD.category, 'Uncategorized');
+            INSERT INTO category_counts (category, item_count)
+            VALUES (COALESCE(NEW.category, 'Uncategorized'), 1)
+            ON CONFLICT(category) DO UPDATE SET item_count = item_count + 1;
+        END;
+        CREATE TRIGGER IF NOT EXISTS trg_videos_delete AFTER DELETE ON videos BEGIN
+            UPDATE category_counts SET item_count = item_count - 1
+            WHERE category = COALESCE(OLD.category, 'Uncategorized');
+            DELETE FROM video_tags WHERE video_id = OLD.id;
+        END;
+        """
+    )
+    if is_new:
+        backfill(conn)
+    conn.commit()
+
+
+def _is_error_placeholder(tags) -> bool:
+    return isinstance(tags, str) and tags.strip().casefold() == "error"
+
+
+def backfill(conn):
+    """Normalizes existing rows and rebuilds all facet counts from scratch."""
+    rows = conn.execute("SELECT id, tags, category FROM videos").fetchall()
+    conn.executemany(
+        "UPDATE videos SET category = ? WHERE id = ?",
+        [(normalize_category(row[2]), row[0]) for row in rows],
+    )
+    # Failed enrichments used to store the placeholder tag "Error".
+    conn.executemany(
+        "UPDATE videos SET tags = ? WHERE id = ?",
+        [
+            (
+                set_video_tags(
+                    conn, row[0], "" if _is_error_placeholder(row[1]) else row[1], commit=False
+                ),
+                row[0],
+            )
+            for row in rows
+        ],
+    )
+    rebuild_counts(conn)
+    conn.commit()
+
+
+def rebuild_counts(conn):
+    conn.execute(
+        "UPDATE tags SET item_count = (SELECT COUNT(*) FROM video_tags WHERE tag_id = tags.id)"
+    )
+    conn.execute("DELETE FROM category_counts")
+    conn.execute(
+        """
+        INSERT INTO category_counts (category, item_count)
+        SELECT COALESCE(category, 'Uncategorized'), COUNT(*) FROM videos
+        GROUP BY COALESCE(category, 'Uncategorized')
+        """
+    )
+
+
+# --- Writes ---
+def set_video_tags(conn, video_id: int, tags, commit: bool = True) -> str:
+    """
+    Replaces a video's tag links with the normalized tags and returns them
+    joined back into the display string stored in videos.tags.
+    """
+    display_tags = parse_tags(tags)
+    conn.executemany(
+        "INSERT OR IGNORE INTO tags (name, display_name) VALUES (?, ?)",
+        [(tag.casefold(), tag) for tag in display_tags],
+    )
+    keys = [tag.casefold() for tag in display_tags]
+    placeholders = ", ".join("?" * len(keys))
+    if keys:
+        conn.execute(
+            f"""
+            DELETE FROM video_tags WHERE video_id = ?
+            AND tag_id NOT IN (SELECT id FROM tags WHERE name IN ({placeholders}))
+            """,
+            [video_id] + keys,
+        )
+        conn.execute(
+            f"""
+            INSERT OR IGNORE INTO video_tags (video_id, tag_id)
+            SELECT ?, id FROM tags WHERE name IN ({placeholders})
+            """,
+            [video_id] + keys,
+        )
+    else:
+        conn.execute("DELETE FROM video_tags WHERE video_id = ?", (video_id,))
+    if commit:
+        conn.commit()
+    return ", ".join(display_tags)
+
+
+# --- Reads ---
+def tag_histogram(conn, limit: int = 100) -> list:
+    rows = conn.execute(
+        """
+        SELECT display_name, item_count FROM tags WHERE item_count > 0
+        ORDER BY item_count DESC, name LIMIT ?
+        """,
+        (limit,),
+    ).fetchall()
+    return [{"name": row[0], "count": row[1]} for row in rows]
+
+
+def category_histogram(conn) -> list:
+    rows = conn.execute(
+        """
+        SELECT category, item_count FROM category_counts WHERE item_count > 0
+        ORDER BY item_count DESC, category
+        """
+    ).fetchall()
+    return [{"name": row[0], "count": row[1]} for row in rows]
+
+
+def _filter_clause(tags: list, category: str):
+    clauses, params = [], []
+    keys = list(dict.fromkeys(t.casefold() for t in parse_tags(tags)))
+    if keys:
+        placeholders = ", ".join("?" * len(keys))
+        clauses.append(
+            f"""
+            id IN (
+                SELECT vt.video_id FROM video_tags vt JOIN tags t ON t.id = vt.tag_id
+                WHERE t.name IN ({placeholders})
+                GROUP BY vt.video_id HAVING COUNT(*) = ?
+            )"""
+        )
+        params += keys + [len(keys)]
+    if category:
+        clauses.append("category = ?")
+        params.append(normalize_category(category))
+    where = f"WHERE {' AND '.join(clauses)}" if clauses else ""
+    return where, params
+
+
+def filter_videos(conn, tags: list = None, category: str = None, limit: int = 50, offset: int = 0):
+    """Returns (rows, total) for videos matching all given tags and the category."""
+    where, params = _filter_clause(tags, category)
+    total = conn.execute(f"SELECT COUNT(*) FROM videos {where}", params).fetchone()[0]
+    rows = conn.execute(
+        f"SELECT * FROM videos {where} ORDER BY processed_at DESC LIMIT ? OFFSET ?",
+        params + [limit, offset],
+    ).fetchall()
+    return rows, total
@@ -0,0 +1,192 @@
+# http_encoding.py
+# Fast JSON encoding and response compression for the Flask API.
+# Library rows are mostly repetitive text (summaries, URLs, thumbnail links),
+# so JSON bodies shrink several-fold with gzip or brotli. JSON is encoded with
+# orjson when it is installed (falling back to the stdlib encoder), large
+# arrays are encoded and compressed incrementally while they are streamed,
+# and ordinary responses are compressed in an after_request hook.
+# See benchmarks/bench_json_responses.py for sizes and timings.
+import itertools
+import json
+import zlib
+
+from flask import Response, request
+from flask.json.provider import DefaultJSONProvider
+
+import config
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+COMPRESSIBLE_MIMETYPES = {
+    "application/json",
+    "application/x-ndjson",
+    "text/csv",
+    "text/event-stream",
+    "text/html",
+}
+STREAM_BATCH_SIZE = 500
+
+
+# --- JSON ---
+def dumps(obj) -> bytes:
+    """Compact, key-sorted JSON as bytes (the same output shape as Flask's jsonify)."""
+    if orjson is not None:
+        try:
+            # Datetimes are passed to Flask's default, which writes HTTP dates
+            # rather than orjson's ISO 8601.
+            return orjson.dumps(
+                obj,
+                default=DefaultJSONProvider.default,
+                option=orjson.OPT_SORT_KEYS
+                | orjson.OPT_NON_STR_KEYS
+                | orjson.OPT_PASSTHROUGH_DATETIME,
+            )
+        except TypeError:
+            # Integers beyond 64 bits and the few other values orjson rejects.
+            pass
+    return json.dumps(
+        obj, default=DefaultJSONProvider.default, sort_keys=True, separators=(",", ":")
+    ).encode("utf-8")
+
+
+class FastJSONProvider(DefaultJSONProvider):
+    """Flask JSON provider (jsonify, app.json) that encodes with orjson when available."""
+
+    def dumps(self, obj, **kwargs) -> str:
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps(obj).decode("utf-8")
+
+    def response(self, *args, **kwargs) -> Response:
+        if orjson is None:
+            return super().response(*args, **kwargs)
+        obj = self._prepare_response_obj(args, kwargs)
+        return self._app.response_class(dumps(obj) + b"\n", mimetype=self.mimetype)
+
+
+def iter_json_array(items, batch_size: int = STREAM_BATCH_SIZE):
+    """Encodes an iterable of objects as one JSON array, yielding it in byte chunks."""
+    yield b"["
+    items = iter(items)
+    separator = b""
+    while True:
+        batch = list(itertools.islice(items, batch_size))
+        if not batch:
+            break
+        yield separator + b",".join(dumps(item) for item in batch)
+        separator = b","
+    yield b"]"
+
+
+# --- Compression ---
+def negotiate(accept_encoding: str) -> str:
+    """Picks 'br' (if brotli is installed) or 'gzip' from an Accept-Encoding header, else None."""
+    accepted = {}
+    for part in (accept_encoding or "").lower().split(","):
+        name, _, params = part.strip().partition(";")
+        quality = 1.0
+        if params.strip().startswith("q="):
+            try:
+                quality = float(params.strip()[2:])
+            except ValueError:
+                quality = 0.0
+        accepted[name.strip()] = quality
+    for encoding in ("br", "gzip"):
+        if encoding == "br" and brotli is None:
+            continue
+        if accepted.get(encoding, accepted.get("*", 0)) > 0:
+            return encoding
+    return None
+
+
+class _Compressor:
+    """Incremental gzip/brotli compressor with a common compress/flush/finish interface."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self.engine = brotli.Compressor(quality=config.BROTLI_QUALITY)
+        else:
+            # wbits=31 writes a gzip header and trailer.
+            self.engine = zlib.compressobj(config.GZIP_LEVEL, zlib.DEFLATED, 31)
+
+    def compress(self, data: bytes) -> bytes:
+        if self.encoding == "br":
+            return self.engine.process(data)
+        return self.engine.compress(data)
+
+    def flush(self) -> bytes:
+        if self.encoding == "br":
+            return self.engine.flush()
+        return self.engine.flush(zlib.Z_SYNC_FLUSH)
+
+    def finish(self) -> bytes:
+        if self.encoding == "br":
+            return self.engine.finish()
+        return self.engine.flush(zlib.Z_FINISH)
+
+
+def compress(data: bytes, encoding: str) -> bytes:
+    compressor = _Compressor(encoding)
+    return compressor.compress(data) + compressor.finish()
+
+
+def compress_stream(chunks, encoding: str, flush_each: bool = False):
+    """
+    Compresses a stream of byte chunks. With flush_each every chunk is sent as
+    soon as it is compressed (for event streams); otherwise the compressor
+    buffers until it has a worthwhile block.
+    """
+    if not encoding:
+        yield from chunks
+        return
+    compressor = _Compressor(encoding)
+    for chunk in chunks:
+        data = compressor.compress(chunk)
+        if flush_each:
+            data += compressor.flush()
+        if data:
+            yield data
+    yield compressor.finish()
+
+
+def stream_response(chunks, mimetype: str, headers: dict = None, flush_each: bool = False):
+    """Streams byte chunks, compressed with whatever encoding the client accepts."""
+    encoding = None
+    if mimetype in COMPRESSIBLE_MIMETYPES:
+        encoding = negotiate(request.headers.get("Accept-Encoding"))
+    response = Response(
+        compress_stream(chunks, encoding, flush_each), mimetype=mimetype, headers=headers
+    )
+    response.vary.add("Accept-Encoding")
+    if encoding:
+        response.headers["Content-Encoding"] = encoding
+    return response
+
+
+def compress_response(response):
+    """after_request hook: compresses complete (non-streamed) text and JSON responses."""
+    if (
+        response.direct_passthrough
+        or response.is_streamed
+        or response.mimetype not in COMPRESSIBLE_MIMETYPES
+        or "Content-Encoding" in response.headers
+        or not 200 <= response.status_code < 300
+    ):
+        return response
+    response.vary.add("Accept-Encoding")
+    encoding = negotiate(request.headers.get("Accept-Encoding"))
+    data = response.get_data()
+    if not encoding or len(data) < config.COMPRESSION_MIN_SIZE:
+        return response
+    response.set_data(compress(data, encoding))
+    response.headers["Content-Encoding"] = encoding
+    return response
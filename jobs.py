@@ -0,0 +1,238 @@
+# jobs.py
+# Persistent checkpoint state for batch runs and playlist walks.
+# Every item gets a row in `job_items` that moves through
+# pending -> running -> done/failed, so a restarted server (or a crashed
+# enricher subprocess) can pick up from the first unfinished item instead
+# of redoing hours of enrichment.
+import os
+import uuid
+from datetime import datetime
+
+try:
+    import fcntl
+except ImportError:
+    # Windows
+    fcntl = None
+    import msvcrt
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+BATCH_PREFIX = "batch:"
+PLAYLIST_PREFIX = "playlist:"
+
+
+# --- Schema ---
+def setup_jobs_tables(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS job_items (
+            scope TEXT NOT NULL, item TEXT NOT NULL, position INTEGER NOT NULL,
+            status TEXT NOT NULL DEFAULT 'pending', attempts INTEGER NOT NULL DEFAULT 0,
+            last_error TEXT, created_at TIMESTAMP NOT NULL, updated_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (scope, item)
+        )"""
+    )
+    conn.execute(
+        "CREATE INDEX IF NOT EXISTS idx_job_items_scope_status ON job_items (scope, status, position)"
+    )
+    conn.commit()
+
+
+# --- Item State ---
+def enqueue_items(conn, scope: str, items: list):
+    """Adds items to a scope. Items already checkpointed keep their state."""
+    now = datetime.now()
+    conn.executemany(
+        """
+        INSERT OR IGNORE INTO job_items (scope, item, position, status, attempts, created_at, updated_at)
+        VALUES (?, ?, ?, ?, 0, ?, ?)
+        """,
+        [(scope, item, i, PENDING, now, now) for i, item in enumerate(items)],
+    )
+    conn.commit()
+
+
+def create_batch(conn, items: list) -> str:
+    """Checkpoints a new batch and returns its scope key."""
+    scope = f"{BATCH_PREFIX}{datetime.now():%Y%m%d%H%M%S}-{uuid.uuid4().hex[:8]}"
+    enqueue_items(conn, scope, items)
+    return scope
+
+
+def next_item(conn, scope: str):
+    """Returns (item, attempts) for the first pending or interrupted item, or None."""
+    return conn.execute(
+        """
+        SELECT item, attempts FROM job_items
+        WHERE scope = ? AND status IN (?, ?) ORDER BY position LIMIT 1
+        """,
+        (scope, PENDING, RUNNING),
+    ).fetchone()
+
+
+def get_status(conn, scope: str, item: str):
+    row = conn.execute(
+        "SELECT status FROM job_items WHERE scope = ? AND item = ?", (scope, item)
+    ).fetchone()
+    return row[0] if row else None
+
+
+def _set_status(conn, scope: str, item: str, status: str, error: str = None):
+    conn.execute(
+        "UPDATE job_items SET status = ?, last_error = ?, updated_at = ? WHERE scope = ? AND item = ?",
+        (status, error, datetime.now(), scope, item),
+    )
+    conn.commit()
+
+
+def mark_running(conn, scope: str, item: str):
+    conn.execute(
+        """
+        UPDATE job_items SET status = ?, attempts = attempts + 1, updated_at = ?
+        WHERE scope = ? AND item = ?
+        """,
+        (RUNNING, datetime.now(), scope, item),
+    )
+    conn.commit()
+
+
+def mark_done(conn, scope: str, item: str):
+    _set_status(conn, scope, item, DONE)
+
+
+def mark_failed(conn, scope: str, item: str, error: str):
+    _set_status(conn, scope, item, FAILED, error)
+
+
+def mark_pending(conn, scope: str, item: str, error: str = None):
+    """Puts an item back to pending in place, keeping its attempt count."""
+    _set_status(conn, scope, item, PENDING, error)
+
+
+def requeue(conn, scope: str, item: str, error: str = None):
+    """Puts an item back to pending at the end of its scope's queue."""
+    conn.execute(
+        """
+        UPDATE job_items SET status = ?, last_error = ?, updated_at = ?,
+            position = (SELECT MAX(position) + 1 FROM job_items WHERE scope = ?)
+        WHERE scope = ? AND item = ?
+        """,
+        (PENDING, error, datetime.now(), scope, scope, item),
+    )
+    conn.commit()
+
+
+def items_with_status(conn, scope: str, statuses: tuple) -> list:
+    placeholders = ", ".join("?" * len(statuses))
+    rows = conn.execute(
+        f"SELECT item FROM job_items WHERE scope = ? AND status IN ({placeholders}) ORDER BY position",
+        (scope, *statuses),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+def is_queued(conn, item: str) -> bool:
+    """True if the item is waiting or running in any batch."""
+    row = conn.execute(
+        """
+        SELECT 1 FROM job_items WHERE scope LIKE ? AND item = ? AND status IN (?, ?) LIMIT 1
+        """,
+        (BATCH_PREFIX + "%", item, PENDING, RUNNING),
+    ).fetchone()
+    return row is not None
+
+
+def count_items(conn, scope: str) -> dict:
+    """Returns a {status: count} breakdown for a scope."""
+    rows = conn.execute(
+        "SELECT status, COUNT(*) FROM job_items WHERE scope = ? GROUP BY status",
+        (scope,),
+    ).fetchall()
+    return {row[0]: row[1] for row in rows}
+
+
+def clear_scope(conn, scope: str):
+    conn.execute("DELETE FROM job_items WHERE scope = ?", (scope,))
+    conn.commit()
+
+
+def unfinished_batches(conn) -> list:
+    """Returns scopes of batches with pending or interrupted items, oldest first."""
+    rows = conn.execute(
+        """
+        SELECT scope FROM job_items
+        WHERE scope LIKE ? AND status IN (?, ?)
+        GROUP BY scope ORDER BY MIN(created_at)
+        """,
+        (BATCH_PREFIX + "%", PENDING, RUNNING),
+    ).fetchall()
+    return [row[0] for row in rows]
+
+
+# --- Lock File ---
+# The lock is an OS file lock (flock, or msvcrt on Windows) on LOCK_FILE, not
+# the file's existence: the kernel drops it when the owning process dies, so a
+# restarted server never mistakes a reused pid for a live owner. The file itself
+# is left in place; it only records the owner's pid for humans.
+_held_locks = {}
+
+
+def _try_lock(fd: int, shared: bool = False) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(fd, (fcntl.LOCK_SH if shared else fcntl.LOCK_EX) | fcntl.LOCK_NB)
+        else:
+            msvcrt.locking(fd, msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _unlock(fd: int):
+    if fcntl is not None:
+        fcntl.flock(fd, fcntl.LOCK_UN)
+    else:
+        os.lseek(fd, 0, os.SEEK_SET)
+        msvcrt.locking(fd, msvcrt.LK_UNLCK, 1)
+
+
+def acquire_lock(path: str) -> bool:
+    """Takes the lock without blocking. Returns False if any process (or thread) holds it."""
+    if path in _held_locks:
+        return False
+    fd = os.open(path, os.O_CREAT | os.O_RDWR)
+    if not _try_lock(fd):
+        os.close(fd)
+        return False
+    _held_locks[path] = fd
+    os.ftruncate(fd, 0)
+    os.write(fd, str(os.getpid()).encode())
+    return True
+
+
+def release_lock(path: str):
+    fd = _held_locks.pop(path, None)
+    if fd is None:
+        return
+    _unlock(fd)
+    os.close(fd)
+
+
+def lock_is_held(path: str) -> bool:
+    if path in _held_locks:
+        return True
+    try:
+        fd = os.open(path, os.O_RDWR)
+    except FileNotFoundError:
+        return False
+    try:
+        # Probing with a shared lock only conflicts with a live exclusive holder.
+        if not _try_lock(fd, shared=True):
+            return True
+        _unlock(fd)
+        return False
+    finally:
+        os.close(fd)
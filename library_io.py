@@ -0,0 +1,352 @@
+# library_io.py
+# Streaming bulk export and import of the enriched library.
+# Exports walk a single SELECT with fetchmany, so only one batch of rows is
+# held in memory at a time whatever the library size, and every batch is
+# encoded to NDJSON, CSV or Parquet and handed on immediately. Imports read an
+# export back in batches, committing each batch as one transaction. Playlists
+# travel as URL/title columns on their videos, so ids never have to match
+# between instances. Parquet needs the optional `pyarrow` package.
+import argparse
+import csv
+import io
+import itertools
+import json
+import sqlite3
+import sys
+from datetime import datetime
+
+import config
+import facets
+import urls
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+BATCH_SIZE = 5000
+
+EXPORT_COLUMNS = [
+    "name",
+    "url",
+    "type",
+    "summary",
+    "tags",
+    "category",
+    "thumbnail_url",
+    "uploader",
+    "duration",
+    "processed_at",
+    "playlist_url",
+    "playlist_title",
+    "playlist_uploader",
+]
+EXPORT_QUERY = """
+    SELECT v.name, v.url, v.type, v.summary, v.tags, v.category, v.thumbnail_url,
+        v.uploader, v.duration, v.processed_at, p.url, p.title, p.uploader
+    FROM videos v LEFT JOIN playlists p ON p.id = v.playlist_id
+    ORDER BY v.id
+"""
+
+# format -> (mimetype, file extension)
+FORMATS = {
+    "ndjson": ("application/x-ndjson", ".ndjson"),
+    "csv": ("text/csv", ".csv"),
+    "parquet": ("application/vnd.apache.parquet", ".parquet"),
+}
+
+
+def parquet_available() -> bool:
+    return pq is not None
+
+
+def format_from_path(path: str) -> str:
+    """Guesses the format from a file extension ('.jsonl' counts as NDJSON)."""
+    lower = (path or "").lower()
+    if lower.endswith(".jsonl"):
+        return "ndjson"
+    for fmt, (_, extension) in FORMATS.items():
+        if lower.endswith(extension):
+            return fmt
+    return None
+
+
+def check_format(fmt: str):
+    if fmt not in FORMATS:
+        raise ValueError(f"Unknown format '{fmt}'. Use one of: {', '.join(FORMATS)}.")
+    if fmt == "parquet" and not parquet_available():
+        raise ValueError("Parquet support requires the optional 'pyarrow' package.")
+
+
+def _to_int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+# --- Export ---
+def iter_batches(conn, batch_size: int = BATCH_SIZE):
+    """Yields the export rows as lists of tuples, one batch at a time."""
+    cursor = conn.execute(EXPORT_QUERY)
+    try:
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                return
+            yield [tuple(row) for row in rows]
+    finally:
+        cursor.close()
+
+
+def _ndjson_chunks(batches):
+    for rows in batches:
+        yield "".join(
+            json.dumps(dict(zip(EXPORT_COLUMNS, row)), ensure_ascii=False, default=str)
+            + "\n"
+            for row in rows
+        ).encode("utf-8")
+
+
+def _csv_chunks(batches):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(EXPORT_COLUMNS)
+    for rows in batches:
+        writer.writerows(rows)
+        yield buffer.getvalue().encode("utf-8")
+        buffer.seek(0)
+        buffer.truncate()
+    if buffer.tell():
+        yield buffer.getvalue().encode("utf-8")
+
+
+class _ChunkSink(io.RawIOBase):
+    """Write-only stream that collects what the Parquet writer emits until drained."""
+
+    def __init__(self):
+        self.chunks = []
+        self.position = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self.chunks.append(bytes(data))
+        self.position += len(data)
+        return len(data)
+
+    def tell(self):
+        return self.position
+
+    def drain(self) -> bytes:
+        data = b"".join(self.chunks)
+        self.chunks = []
+        return data
+
+
+def _parquet_schema():
+    return pa.schema(
+        [
+            (column, pa.int64() if column == "duration" else pa.string())
+            for column in EXPORT_COLUMNS
+        ]
+    )
+
+
+def _parquet_chunks(batches):
+    schema = _parquet_schema()
+    duration_index = EXPORT_COLUMNS.index("duration")
+    sink = _ChunkSink()
+    writer = pq.ParquetWriter(sink, schema)
+    try:
+        for rows in batches:
+            columns = list(zip(*rows))
+            arrays = [
+                pa.array(
+                    [_to_int(v) for v in values]
+                    if i == duration_index
+                    else [None if v is None else str(v) for v in values],
+                    type=schema.field(i).type,
+                )
+                for i, values in enumerate(columns)
+            ]
+            # One row group per batch; its bytes are final once written.
+            writer.write_table(pa.Table.from_arrays(arrays, schema=schema))
+            yield sink.drain()
+    finally:
+        writer.close()
+    yield sink.drain()
+
+
+def export_chunks(conn, fmt: str, batch_size: int = BATCH_SIZE):
+    """Yields the whole library encoded as `fmt`, as a stream of byte chunks."""
+    check_format(fmt)
+    encoder = {"ndjson": _ndjson_chunks, "csv": _csv_chunks, "parquet": _parquet_chunks}[fmt]
+    return encoder(iter_batches(conn, batch_size))
+
+
+def export_to_file(conn, path: str, fmt: str = None, batch_size: int = BATCH_SIZE):
+    fmt = fmt or format_from_path(path) or "ndjson"
+    with open(path, "wb") as f:
+        for chunk in export_chunks(conn, fmt, batch_size):
+            f.write(chunk)
+
+
+# --- Import ---
+def read_records(path: str, fmt: str = None, batch_size: int = BATCH_SIZE):
+    """Yields one dict per exported video, streaming from the file."""
+    fmt = fmt or format_from_path(path) or "ndjson"
+    check_format(fmt)
+    if fmt == "parquet":
+        for record_batch in pq.ParquetFile(path).iter_batches(batch_size=batch_size):
+            yield from record_batch.to_pylist()
+        return
+    with open(path, "r", encoding="utf-8", newline="") as f:
+        if fmt == "csv":
+            # Summaries can exceed csv's default 128 KB field limit.
+            csv.field_size_limit(max(csv.field_size_limit(), 16 * 1024 * 1024))
+            try:
+                yield from csv.DictReader(f)
+            except csv.Error as e:
+                raise ValueError(f"malformed CSV: {e}") from e
+        else:
+            for line in f:
+                if line.strip():
+                    yield json.loads(line)
+
+
+def _playlist_id(conn, record: dict, cache: dict):
+    playlist_url = record.get("playlist_url")
+    if not playlist_url:
+        return None
+    if playlist_url not in cache:
+        conn.execute(
+            """
+            INSERT INTO playlists (title, url, url_key, uploader, processed_at)
+            VALUES (?, ?, ?, ?, ?)
+            ON CONFLICT(url) DO UPDATE SET
+                title = excluded.title, uploader = COALESCE(excluded.uploader, uploader)
+            """,
+            (
+                record.get("playlist_title") or "Untitled Playlist",
+                playlist_url,
+                urls.canonical_url_key(playlist_url),
+                record.get("playlist_uploader") or None,
+                record.get("processed_at") or datetime.now(),
+            ),
+        )
+        cache[playlist_url] = conn.execute(
+            "SELECT id FROM playlists WHERE url = ?", (playlist_url,)
+        ).fetchone()[0]
+    return cache[playlist_url]
+
+
+def _import_batch(conn, records: list, playlist_cache: dict) -> int:
+    rows, tags_by_url = [], {}
+    for record in records:
+        if not isinstance(record, dict):
+            raise ValueError(f"expected one object per record, got {type(record).__name__}")
+        url = (record.get("url") or "").strip()
+        if not url:
+            continue
+        tags = facets.parse_tags(record.get("tags"))
+        tags_by_url[url] = tags
+        rows.append(
+            (
+                record.get("name") or url,
+                url,
+                urls.canonical_url_key(url),
+                record.get("type") or None,
+                record.get("summary"),
+                ", ".join(tags),
+                facets.normalize_category(record.get("category")),
+                record.get("thumbnail_url") or None,
+                record.get("uploader") or None,
+                _to_int(record.get("duration")),
+                record.get("processed_at") or datetime.now(),
+                _playlist_id(conn, record, playlist_cache),
+            )
+        )
+    # Same upsert as enricher.save_video_to_db, so re-importing keeps row ids stable.
+    conn.executemany(
+        """
+        INSERT INTO videos
+        (name, url, url_key, type, summary, tags, category, thumbnail_url, uploader, duration, processed_at, playlist_id)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(url) DO UPDATE SET
+            name = excluded.name, url_key = excluded.url_key, type = excluded.type,
+            summary = excluded.summary, tags = excluded.tags, category = excluded.category,
+            thumbnail_url = excluded.thumbnail_url, uploader = excluded.uploader,
+            duration = excluded.duration, processed_at = excluded.processed_at,
+            playlist_id = excluded.playlist_id
+        """,
+        rows,
+    )
+    batch_urls = list(tags_by_url)
+    for start in range(0, len(batch_urls), urls.LOOKUP_CHUNK_SIZE):
+        chunk = batch_urls[start : start + urls.LOOKUP_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        for video_id, url in conn.execute(
+            f"SELECT id, url FROM videos WHERE url IN ({placeholders})", chunk
+        ).fetchall():
+            facets.set_video_tags(conn, video_id, tags_by_url[url], commit=False)
+    return len(rows)
+
+
+def import_records(conn, records, batch_size: int = BATCH_SIZE, log=print) -> int:
+    """
+    Upserts exported records into the library, committing every `batch_size`
+    records as one transaction. Returns the number of videos imported.
+    """
+    records = iter(records)
+    playlist_cache = {}
+    imported = 0
+    while True:
+        batch = list(itertools.islice(records, batch_size))
+        if not batch:
+            return imported
+        try:
+            imported += _import_batch(conn, batch, playlist_cache)
+            conn.commit()
+        except (sqlite3.Error, ValueError):
+            conn.rollback()
+            raise
+        log(f"Imported {imported} video(s)...")
+
+
+def import_file(conn, path: str, fmt: str = None, batch_size: int = BATCH_SIZE, log=print) -> int:
+    return import_records(conn, read_records(path, fmt, batch_size), batch_size, log)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(
+        description="Export the library to, or import it from, NDJSON, CSV or Parquet."
+    )
+    subparsers = parser.add_subparsers(dest="command", required=True)
+    for command in ("export", "import"):
+        sub = subparsers.add_parser(command)
+        sub.add_argument("path", help="File to write (export) or read (import).")
+        sub.add_argument(
+            "--format", choices=list(FORMATS), help="Defaults to the file extension."
+        )
+        sub.add_argument("--batch-size", type=int, default=BATCH_SIZE)
+    args = parser.parse_args()
+
+    try:
+        check_format(args.format or format_from_path(args.path) or "ndjson")
+    except ValueError as e:
+        sys.exit(f"ERROR: {e}")
+    if args.command == "export":
+        conn = sqlite3.connect(config.DB_FILE)
+        export_to_file(conn, args.path, args.format, args.batch_size)
+        print(f"Exported the library to {args.path}.")
+    else:
+        from app import setup_database
+
+        setup_database()
+        conn = sqlite3.connect(config.DB_FILE)
+        imported = import_file(conn, args.path, args.format, args.batch_size)
+        print(f"Imported {imported} video(s) from {args.path}.")
+    conn.close()
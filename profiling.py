@@ -0,0 +1,125 @@
+# profiling.py
+# Opt-in cProfile hooks. With ENRICH_PROFILE=1 in the environment (inherited
+# by the enricher subprocesses) every enriched item and every /api/* request
+# is profiled; a single request can opt in with ?profile=1. Each profile is
+# written to PROFILE_DIR as its own .prof file (loadable with pstats or
+# snakeviz) and only the newest PROFILE_RETENTION files are kept.
+import cProfile
+import functools
+import itertools
+import os
+import pstats
+import re
+import time
+
+import config
+
+PROFILE_SUFFIX = ".prof"
+# Distinguishes profiles written by one process within the same millisecond.
+_sequence = itertools.count()
+SORT_KEYS = ("cumulative", "tottime", "ncalls")
+
+
+def enabled() -> bool:
+    return os.environ.get(config.PROFILE_ENV_VAR, "").lower() in ("1", "true", "yes")
+
+
+def _slug(text: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_.-]+", "_", str(text)).strip("_")[:60] or "item"
+
+
+def save(profiler: cProfile.Profile, kind: str, label: str) -> str:
+    """Writes a finished profile to PROFILE_DIR, prunes old ones and returns its filename."""
+    os.makedirs(config.PROFILE_DIR, exist_ok=True)
+    now = time.time()
+    stamp = f"{time.strftime('%Y%m%d-%H%M%S', time.localtime(now))}.{int(now * 1000) % 1000:03d}"
+    name = (
+        f"{stamp}-{os.getpid()}-{next(_sequence):06d}-{_slug(kind)}-{_slug(label)}"
+        + PROFILE_SUFFIX
+    )
+    profiler.dump_stats(os.path.join(config.PROFILE_DIR, name))
+    prune()
+    return name
+
+
+def prune(keep: int = None):
+    """Deletes all but the newest `keep` profiles (PROFILE_RETENTION by default)."""
+    keep = config.PROFILE_RETENTION if keep is None else keep
+    for name in list_profiles()[keep:]:
+        try:
+            os.remove(os.path.join(config.PROFILE_DIR, name))
+        except FileNotFoundError:
+            # Another process pruned it first.
+            pass
+
+
+def start():
+    """
+    Starts profiling the current thread and returns the profiler, or None if
+    another profiler is already active (Python 3.12+ allows only one at a time).
+    """
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        return None
+    return profiler
+
+
+def profiled(kind: str, label=None):
+    """
+    Decorator that profiles each call when profiling is enabled. `label` maps
+    the call's first argument to a readable name for the file.
+    """
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not enabled():
+                return func(*args, **kwargs)
+            profiler = start()
+            if profiler is None:
+                return func(*args, **kwargs)
+            try:
+                return func(*args, **kwargs)
+            finally:
+                profiler.disable()
+                item = args[0] if args else ""
+                name = save(profiler, kind, label(item) if label else item)
+                print(f"      -> Profile written to {config.PROFILE_DIR}/{name}", flush=True)
+
+        return wrapper
+
+    return decorator
+
+
+# --- Reading ---
+def list_profiles(kind: str = None) -> list:
+    """Profile filenames, newest first, optionally only those of one kind."""
+    if not os.path.isdir(config.PROFILE_DIR):
+        return []
+    names = [n for n in os.listdir(config.PROFILE_DIR) if n.endswith(PROFILE_SUFFIX)]
+    if kind:
+        names = [n for n in names if f"-{_slug(kind)}-" in n]
+    return sorted(names, reverse=True)
+
+
+def hot_functions(names: list, sort: str = "cumulative", limit: int = 25) -> list:
+    """Merges the given profiles and returns their top functions."""
+    paths = [os.path.join(config.PROFILE_DIR, n) for n in names]
+    paths = [p for p in paths if os.path.exists(p)]
+    if not paths:
+        return []
+    stats = pstats.Stats(*paths)
+    rows = []
+    for (filename, line, function), (_, ncalls, tottime, cumtime, _) in stats.stats.items():
+        rows.append(
+            {
+                "function": f"{os.path.basename(filename)}:{line}({function})",
+                "ncalls": ncalls,
+                "tottime": round(tottime, 4),
+                "cumulative": round(cumtime, 4),
+            }
+        )
+    rows.sort(key=lambda r: r[sort], reverse=True)
+    return rows[:limit]
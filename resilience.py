@@ -0,0 +1,236 @@
+# resilience.py
+# Retry, backoff and circuit breaking around calls to YouTube (yt-dlp) and
+# Gemini. Errors are classified as retryable or terminal; retryable ones are
+# retried with exponential backoff and jitter (honouring retry-after hints).
+# Circuit state lives in SQLite so the enricher subprocesses and the batch
+# scheduler in app.py see the same view of each service.
+import random
+import re
+import sqlite3
+import time
+from datetime import datetime, timedelta
+
+import config
+
+GEMINI = "gemini"
+YOUTUBE = "youtube"
+
+# Exit code (EX_TEMPFAIL) used by enricher.py to ask the scheduler to re-queue an item.
+EXIT_RETRY = 75
+
+RETRYABLE_STATUS_CODES = {408, 425, 429, 500, 502, 503, 504}
+
+RETRYABLE_PATTERNS = re.compile(
+    r"HTTP Error (408|429|5\d\d)|Too Many Requests|RESOURCE_EXHAUSTED|UNAVAILABLE"
+    r"|DEADLINE_EXCEEDED|rate.?limit|quota|timed? ?out|Connection (reset|refused|aborted)"
+    r"|Temporary failure|Sign in to confirm",
+    re.IGNORECASE,
+)
+TERMINAL_PATTERNS = re.compile(
+    r"Video unavailable|Private video|has been removed|members-only|not available in your country"
+    r"|Unsupported URL|Incomplete YouTube ID|API key not valid|PERMISSION_DENIED",
+    re.IGNORECASE,
+)
+
+
+class RetryableError(Exception):
+    """A transient failure that is worth trying again later."""
+
+    def __init__(self, message, retry_after: float = None):
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+class TerminalError(Exception):
+    """A failure that will not go away by retrying (bad input, removed video, ...)."""
+
+
+class CircuitOpenError(RetryableError):
+    """Raised instead of calling a service whose circuit is open."""
+
+
+# --- Error Classification ---
+def _status_code(exc):
+    for attr in ("code", "status_code"):
+        value = getattr(exc, attr, None)
+        if isinstance(value, int):
+            return value
+    response = getattr(exc, "response", None)
+    value = getattr(response, "status_code", None)
+    return value if isinstance(value, int) else None
+
+
+def parse_retry_after(exc):
+    """Extracts a retry-after hint (seconds) from response headers or Google RetryInfo."""
+    response = getattr(exc, "response", None)
+    headers = getattr(response, "headers", None) or {}
+    try:
+        header = headers.get("Retry-After")
+    except AttributeError:
+        header = None
+    if header:
+        try:
+            return float(header)
+        except ValueError:
+            pass
+    text = f"{exc} {getattr(exc, 'details', '')}"
+    match = re.search(r"retry[_ ]?delay['\"]?\s*[:=]\s*['\"]?(\d+(?:\.\d+)?)s", text, re.I)
+    if match:
+        return float(match.group(1))
+    match = re.search(r"retry in (\d+(?:\.\d+)?)\s*s", text, re.I)
+    return float(match.group(1)) if match else None
+
+
+def classify_error(exc) -> Exception:
+    """Maps any exception onto a RetryableError or TerminalError."""
+    if isinstance(exc, (RetryableError, TerminalError)):
+        return exc
+    message = str(exc)
+    status = _status_code(exc)
+    if status is not None:
+        if status in RETRYABLE_STATUS_CODES:
+            return RetryableError(message, parse_retry_after(exc))
+        if 400 <= status < 500:
+            return TerminalError(message)
+    if TERMINAL_PATTERNS.search(message):
+        return TerminalError(message)
+    name = type(exc).__name__
+    if (
+        RETRYABLE_PATTERNS.search(message)
+        or isinstance(exc, (ConnectionError, TimeoutError))
+        or "Timeout" in name
+        or "Connect" in name
+    ):
+        return RetryableError(message, parse_retry_after(exc))
+    return TerminalError(message)
+
+
+def backoff_delay(attempt: int, retry_after: float = None) -> float:
+    """Full-jitter exponential backoff for the given (1-based) attempt, respecting retry-after."""
+    ceiling = min(config.RETRY_MAX_DELAY, config.RETRY_BASE_DELAY * (2 ** (attempt - 1)))
+    delay = random.uniform(0, ceiling)
+    if retry_after:
+        delay = max(delay, retry_after)
+    return delay
+
+
+# --- Circuit Breaker ---
+def _connect():
+    conn = sqlite3.connect(config.DB_FILE, timeout=30)
+    setup_circuit_table(conn)
+    return conn
+
+
+def setup_circuit_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS circuit_breakers (
+            service TEXT PRIMARY KEY, failures INTEGER NOT NULL DEFAULT 0,
+            open_until TIMESTAMP, last_error TEXT, updated_at TIMESTAMP NOT NULL
+        )"""
+    )
+    conn.commit()
+
+
+def circuit_wait(service: str) -> float:
+    """Returns the seconds left until the service's circuit half-opens (0 if closed)."""
+    conn = _connect()
+    row = conn.execute(
+        "SELECT open_until FROM circuit_breakers WHERE service = ?", (service,)
+    ).fetchone()
+    conn.close()
+    if not row or not row[0]:
+        return 0.0
+    remaining = (datetime.fromisoformat(row[0]) - datetime.now()).total_seconds()
+    return max(0.0, remaining)
+
+
+def open_circuits() -> dict:
+    """Returns {service: seconds remaining} for every service whose circuit is open."""
+    conn = _connect()
+    rows = conn.execute(
+        "SELECT service, open_until FROM circuit_breakers WHERE open_until IS NOT NULL"
+    ).fetchall()
+    conn.close()
+    now = datetime.now()
+    waits = {
+        service: (datetime.fromisoformat(until) - now).total_seconds()
+        for service, until in rows
+    }
+    return {service: wait for service, wait in waits.items() if wait > 0}
+
+
+def record_success(service: str):
+    conn = _connect()
+    conn.execute(
+        """
+        INSERT INTO circuit_breakers (service, failures, open_until, updated_at) VALUES (?, 0, NULL, ?)
+        ON CONFLICT(service) DO UPDATE SET failures = 0, open_until = NULL, updated_at = excluded.updated_at
+        """,
+        (service, datetime.now()),
+    )
+    conn.commit()
+    conn.close()
+
+
+def record_failure(service: str, error: RetryableError):
+    """Counts a retryable failure; opens the circuit once the threshold is reached."""
+    conn = _connect()
+    now = datetime.now()
+    conn.execute(
+        """
+        INSERT INTO circuit_breakers (service, failures, last_error, updated_at) VALUES (?, 1, ?, ?)
+        ON CONFLICT(service) DO UPDATE SET failures = failures + 1,
+            last_error = excluded.last_error, updated_at = excluded.updated_at
+        """,
+        (service, str(error)[:500], now),
+    )
+    failures = conn.execute(
+        "SELECT failures FROM circuit_breakers WHERE service = ?", (service,)
+    ).fetchone()[0]
+    if failures >= config.CIRCUIT_FAILURE_THRESHOLD:
+        cooldown = max(config.CIRCUIT_COOLDOWN_SECONDS, error.retry_after or 0)
+        conn.execute(
+            "UPDATE circuit_breakers SET open_until = ? WHERE service = ?",
+            (now + timedelta(seconds=cooldown), service),
+        )
+        print(
+            f"      -> Circuit for '{service}' opened for {cooldown:.0f}s after {failures} consecutive failures.",
+            flush=True,
+        )
+    conn.commit()
+    conn.close()
+
+
+# --- Retry Wrapper ---
+def call_with_retry(service: str, func, *args, **kwargs):
+    """
+    Calls func(*args, **kwargs), retrying retryable failures with backoff.
+    Raises TerminalError for permanent failures and RetryableError (or
+    CircuitOpenError) once retries are exhausted or the circuit is open.
+    """
+    for attempt in range(1, config.RETRY_MAX_ATTEMPTS + 1):
+        wait = circuit_wait(service)
+        if wait > 0:
+            raise CircuitOpenError(
+                f"Circuit for '{service}' is open for another {wait:.0f}s.", wait
+            )
+        try:
+            result = func(*args, **kwargs)
+        except Exception as e:
+            error = classify_error(e)
+            if isinstance(error, TerminalError):
+                raise error from e
+            record_failure(service, error)
+            if attempt == config.RETRY_MAX_ATTEMPTS:
+                raise error from e
+            delay = backoff_delay(attempt, error.retry_after)
+            print(
+                f"      -> {service} call failed ({error}); retry {attempt} of "
+                f"{config.RETRY_MAX_ATTEMPTS - 1} in {delay:.1f}s...",
+                flush=True,
+            )
+            time.sleep(delay)
+        else:
+            record_success(service)
+            return result
@@ -0,0 +1,151 @@
+# routing.py
+# Per-item model routing for Gemini enrichment. Instead of one model and one
+# thinking budget for everything, each call picks a route from
+# config.MODEL_ROUTES by item type and content length, so a one-line
+# description does not pay for the same model and reasoning as a full lecture
+# transcript. Every call's latency and token usage is accumulated per route
+# and model in SQLite, where the enricher subprocesses and app.py share it.
+import sqlite3
+import time
+from dataclasses import dataclass
+from datetime import datetime
+
+import config
+
+
+@dataclass(slots=True)
+class Route:
+    name: str
+    model: str
+    thinking_budget: int
+    fallback_model: str = None
+    max_input_chars: int = None
+
+
+def _matches(rule: dict, item_type: str, content_chars: int) -> bool:
+    types = rule.get("types")
+    if types and item_type not in types:
+        return False
+    max_chars = rule.get("max_chars")
+    return max_chars is None or content_chars <= max_chars
+
+
+def choose_route(item_type: str, content_chars: int, model_override: str = None) -> Route:
+    """
+    Returns the first matching route. With model_override (the enricher's
+    --model flag) the route's budget is kept but its model is replaced.
+    """
+    rule = next(
+        (r for r in config.MODEL_ROUTES if _matches(r, item_type, content_chars)),
+        config.MODEL_ROUTES[-1],
+    )
+    model = model_override or rule["model"]
+    fallback = rule.get("fallback_model", config.FALLBACK_MODEL)
+    return Route(
+        name=rule["name"],
+        model=model,
+        thinking_budget=rule.get("thinking_budget", 0),
+        fallback_model=fallback if fallback != model else None,
+        max_input_chars=rule.get("max_input_chars"),
+    )
+
+
+# --- Stats ---
+def _connect():
+    conn = sqlite3.connect(config.DB_FILE, timeout=30)
+    setup_route_stats_table(conn)
+    return conn
+
+
+def setup_route_stats_table(conn):
+    conn.execute(
+        """
+        CREATE TABLE IF NOT EXISTS route_stats (
+            route TEXT NOT NULL, model TEXT NOT NULL,
+            calls INTEGER NOT NULL DEFAULT 0, failures INTEGER NOT NULL DEFAULT 0,
+            fallbacks INTEGER NOT NULL DEFAULT 0, total_latency REAL NOT NULL DEFAULT 0,
+            max_latency REAL NOT NULL DEFAULT 0, prompt_tokens INTEGER NOT NULL DEFAULT 0,
+            thoughts_tokens INTEGER NOT NULL DEFAULT 0, output_tokens INTEGER NOT NULL DEFAULT 0,
+            last_used_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (route, model)
+        )"""
+    )
+    conn.commit()
+
+
+def _token_counts(response):
+    usage = getattr(response, "usage_metadata", None)
+    return tuple(
+        getattr(usage, field, None) or 0
+        for field in ("prompt_token_count", "thoughts_token_count", "candidates_token_count")
+    )
+
+
+def record_call(route: Route, model: str, latency: float, response=None, fallback: bool = False):
+    """Adds one call to the route/model totals; a call without a response counts as failed."""
+    prompt, thoughts, output = _token_counts(response)
+    conn = _connect()
+    conn.execute(
+        """
+        INSERT INTO route_stats (route, model, calls, failures, fallbacks, total_latency,
+            max_latency, prompt_tokens, thoughts_tokens, output_tokens, last_used_at)
+        VALUES (?, ?, 1, ?, ?, ?, ?, ?, ?, ?, ?)
+        ON CONFLICT(route, model) DO UPDATE SET
+            calls = calls + 1, failures = failures + excluded.failures,
+            fallbacks = fallbacks + excluded.fallbacks,
+            total_latency = total_latency + excluded.total_latency,
+            max_latency = MAX(max_latency, excluded.max_latency),
+            prompt_tokens = prompt_tokens + excluded.prompt_tokens,
+            thoughts_tokens = thoughts_tokens + excluded.thoughts_tokens,
+            output_tokens = output_tokens + excluded.output_tokens,
+            last_used_at = excluded.last_used_at
+        """,
+        (
+            route.name,
+            model,
+            int(response is None),
+            int(fallback),
+            latency,
+            latency,
+            prompt,
+            thoughts,
+            output,
+            datetime.now(),
+        ),
+    )
+    conn.commit()
+    conn.close()
+
+
+def timed_call(route: Route, model: str, func, fallback: bool = False):
+    """Calls func(), recording its latency and token usage under the route and model."""
+    start = time.monotonic()
+    try:
+        response = func()
+    except Exception:
+        record_call(route, model, time.monotonic() - start, fallback=fallback)
+        raise
+    record_call(route, model, time.monotonic() - start, response, fallback)
+    return response
+
+
+def route_stats(conn) -> list:
+    """Returns per route/model totals with average latency and tokens per call."""
+    cursor = conn.execute(
+        """
+        SELECT route, model, calls, failures, fallbacks, total_latency, max_latency,
+            prompt_tokens, thoughts_tokens, output_tokens, last_used_at
+        FROM route_stats ORDER BY route, model
+        """
+    )
+    columns = [d[0] for d in cursor.description]
+    stats = []
+    for row in cursor.fetchall():
+        entry = dict(zip(columns, row))
+        total_latency = entry.pop("total_latency")
+        tokens = entry["prompt_tokens"] + entry["thoughts_tokens"] + entry["output_tokens"]
+        entry["avg_latency"] = round(total_latency / entry["calls"], 3) if entry["calls"] else 0
+        entry["max_latency"] = round(entry["max_latency"], 3)
+        entry["avg_tokens"] = round(tokens / max(entry["calls"] - entry["failures"], 1))
+        stats.append(entry)
+    return stats
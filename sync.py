@@ -0,0 +1,177 @@
+# sync.py
+# Followed playlists and channels for incremental sync. Each source remembers
+# the entry ids it has already seen, so a sync only needs a cheap flat listing
+# and enriches just the new uploads. Sources are due again `interval_hours`
+# after their last sync; claiming a due source is a single conditional UPDATE,
+# so several Gunicorn workers never queue the same sync twice.
+import math
+from datetime import datetime, timedelta
+from urllib.parse import urlsplit
+
+import config
+import urls
+
+# Batch items with this prefix are run with `enricher.py --sync <url>`.
+SYNC_ITEM_PREFIX = "sync:"
+
+CHANNEL_PATH_PREFIXES = ("/@", "/channel/", "/c/", "/user/")
+CHANNEL_TABS = ("/videos", "/shorts", "/streams")
+
+
+def setup_sync_tables(conn):
+    conn.executescript(
+        """
+        CREATE TABLE IF NOT EXISTS sync_sources (
+            id INTEGER PRIMARY KEY AUTOINCREMENT, url TEXT NOT NULL, url_key TEXT NOT NULL UNIQUE,
+            kind TEXT NOT NULL, playlist_id INTEGER, interval_hours REAL NOT NULL,
+            enabled INTEGER NOT NULL DEFAULT 1, last_synced_at TIMESTAMP,
+            next_sync_at TIMESTAMP NOT NULL, last_new_count INTEGER,
+            FOREIGN KEY (playlist_id) REFERENCES playlists (id)
+        );
+        CREATE INDEX IF NOT EXISTS idx_sync_sources_due ON sync_sources (enabled, next_sync_at);
+        CREATE TABLE IF NOT EXISTS sync_seen (
+            source_id INTEGER NOT NULL, entry_id TEXT NOT NULL, seen_at TIMESTAMP NOT NULL,
+            PRIMARY KEY (source_id, entry_id),
+            FOREIGN KEY (source_id) REFERENCES sync_sources (id)
+        );
+        """
+    )
+    conn.commit()
+
+
+def is_channel_url(url: str) -> bool:
+    parts = urlsplit(url)
+    host = (parts.hostname or "").lower().removeprefix("www.")
+    return host in urls.YOUTUBE_HOSTS and parts.path.startswith(CHANNEL_PATH_PREFIXES)
+
+
+def listing_url(url: str) -> str:
+    """Points channel URLs at their uploads tab so a flat listing returns videos, not tabs."""
+    url = url.strip()
+    if is_channel_url(url) and not urlsplit(url).path.rstrip("/").endswith(CHANNEL_TABS):
+        return url.rstrip("/") + "/videos"
+    return url
+
+
+# --- Sources ---
+def parse_interval(value) -> float:
+    """Validates a requested sync interval in hours; None means the default."""
+    if value is None:
+        return config.SYNC_DEFAULT_INTERVAL_HOURS
+    try:
+        hours = float(value)
+    except (TypeError, ValueError):
+        hours = math.nan
+    if isinstance(value, bool) or not (math.isfinite(hours) and hours > 0):
+        raise ValueError("interval_hours must be a positive number of hours.")
+    return hours
+
+
+def add_source(conn, url: str, interval_hours: float = None) -> int:
+    """Follows a playlist or channel (idempotent) and returns its source id."""
+    url = listing_url(url)
+    interval = float(interval_hours or config.SYNC_DEFAULT_INTERVAL_HOURS)
+    kind = "channel" if is_channel_url(url) else "playlist"
+    conn.execute(
+        """
+        INSERT INTO sync_sources (url, url_key, kind, interval_hours, next_sync_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(url_key) DO UPDATE SET interval_hours = excluded.interval_hours, enabled = 1
+        """,
+        (url, urls.canonical_url_key(url), kind, interval, datetime.now()),
+    )
+    conn.commit()
+    return get_source(conn, url)[0]
+
+
+def get_source(conn, url: str):
+    """Returns (id, url, kind, playlist_id, last_synced_at) for a followed URL, or None."""
+    return conn.execute(
+        """
+        SELECT id, url, kind, playlist_id, last_synced_at FROM sync_sources WHERE url_key = ?
+        """,
+        (urls.canonical_url_key(listing_url(url)),),
+    ).fetchone()
+
+
+def list_sources(conn) -> list:
+    return conn.execute(
+        """
+        SELECT s.id, s.url, s.kind, s.playlist_id, p.title, s.interval_hours, s.enabled,
+            s.last_synced_at, s.next_sync_at, s.last_new_count,
+            (SELECT COUNT(*) FROM sync_seen WHERE source_id = s.id) AS seen_count
+        FROM sync_sources s LEFT JOIN playlists p ON p.id = s.playlist_id
+        ORDER BY s.id
+        """
+    ).fetchall()
+
+
+def remove_source(conn, source_id: int):
+    conn.execute("DELETE FROM sync_seen WHERE source_id = ?", (source_id,))
+    conn.execute("DELETE FROM sync_sources WHERE id = ?", (source_id,))
+    conn.commit()
+
+
+def forget_playlist(conn, playlist_id: int):
+    """Clears the seen entries of sources whose playlist was deleted, so the next sync refills it."""
+    conn.execute(
+        """
+        DELETE FROM sync_seen WHERE source_id IN (SELECT id FROM sync_sources WHERE playlist_id = ?)
+        """,
+        (playlist_id,),
+    )
+
+
+def claim_due_sources(conn, force: bool = False) -> list:
+    """
+    Returns the URLs of enabled sources that are due (or all of them with force),
+    pushing their next_sync_at forward so no other worker claims them again.
+    """
+    now = datetime.now()
+    rows = conn.execute(
+        "SELECT id, url, interval_hours, next_sync_at FROM sync_sources WHERE enabled = 1"
+        + ("" if force else " AND next_sync_at <= ?"),
+        () if force else (now,),
+    ).fetchall()
+    claimed = []
+    for source_id, url, interval_hours, next_sync_at in rows:
+        cursor = conn.execute(
+            "UPDATE sync_sources SET next_sync_at = ? WHERE id = ? AND next_sync_at = ?",
+            (now + timedelta(hours=interval_hours), source_id, next_sync_at),
+        )
+        if cursor.rowcount:
+            claimed.append(url)
+    conn.commit()
+    return claimed
+
+
+# --- Seen Entries ---
+def seen_ids(conn, source_id: int) -> set:
+    rows = conn.execute(
+        "SELECT entry_id FROM sync_seen WHERE source_id = ?", (source_id,)
+    ).fetchall()
+    return {row[0] for row in rows}
+
+
+def mark_seen(conn, source_id: int, entry_ids: list):
+    now = datetime.now()
+    conn.executemany(
+        "INSERT OR IGNORE INTO sync_seen (source_id, entry_id, seen_at) VALUES (?, ?, ?)",
+        [(source_id, entry_id, now) for entry_id in entry_ids],
+    )
+    conn.commit()
+
+
+def record_sync(conn, source_id: int, playlist_id: int, new_count: int):
+    """Records a finished sync; the playlist's processed_at moves only if videos were added."""
+    now = datetime.now()
+    conn.execute(
+        """
+        UPDATE sync_sources SET playlist_id = ?, last_synced_at = ?, last_new_count = ?
+        WHERE id = ?
+        """,
+        (playlist_id, now, new_count, source_id),
+    )
+    if new_count:
+        conn.execute("UPDATE playlists SET processed_at = ? WHERE id = ?", (now, playlist_id))
+    conn.commit()
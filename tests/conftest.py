@@ -0,0 +1,63 @@
+# tests/conftest.py
+# Shared fixtures. enricher.py imports heavy third-party packages (yt-dlp,
+# google-genai, PyMuPDF, ...); the `enricher` fixture replaces any that are
+# not installed with stand-ins, so import-level breakage is caught everywhere.
+import importlib
+import os
+import sys
+import types
+from unittest import mock
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+THIRD_PARTY_MODULES = [
+    "requests",
+    "bs4",
+    "yt_dlp",
+    "youtube_transcript_api",
+    "youtube_transcript_api.formatters",
+    "google",
+    "google.genai",
+    "pydantic",
+    "fitz",
+]
+
+
+def _stand_in(name: str):
+    module = mock.MagicMock(name=name)
+    # Classes subclassed at import time must be real classes.
+    module.BaseModel = type("BaseModel", (), {})
+    return module
+
+
+@pytest.fixture
+def db_file(tmp_path, monkeypatch):
+    import config
+
+    path = str(tmp_path / "test.db")
+    monkeypatch.setattr(config, "DB_FILE", path)
+    return path
+
+
+@pytest.fixture
+def enricher(monkeypatch):
+    for name in THIRD_PARTY_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            monkeypatch.setitem(sys.modules, name, _stand_in(name))
+    monkeypatch.delitem(sys.modules, "enricher", raising=False)
+    return importlib.import_module("enricher")
+
+
+@pytest.fixture
+def app_module(db_file, tmp_path, monkeypatch):
+    """app.py with its relative upload folder and lock file inside tmp_path."""
+    monkeypatch.chdir(tmp_path)
+    os.makedirs("uploads", exist_ok=True)
+    app = importlib.import_module("app")
+    app.setup_database()
+    return app
@@ -0,0 +1,41 @@
+# tests/test_batch_store.py
+import os
+import sqlite3
+
+import pytest
+
+import batch_store
+
+
+def make_store():
+    conn = sqlite3.connect(":memory:")
+    batch_store.setup_batch_table(conn)
+    return conn
+
+
+def test_legacy_import_skips_bad_lines_and_renames_after_commit(tmp_path):
+    path = tmp_path / "batch_links.txt"
+    path.write_bytes(b"https://youtu.be/abcdefghijk\nhttp://[broken\n\xff\xfe\n\n")
+    conn = make_store()
+
+    assert batch_store.import_legacy_file(conn, str(path)) == 2
+    assert batch_store.count_links(conn) == 2
+    assert not path.exists()
+    assert os.path.exists(f"{path}.imported")
+
+
+def test_failed_legacy_import_keeps_the_file(tmp_path, monkeypatch):
+    path = tmp_path / "batch_links.txt"
+    path.write_text("https://youtu.be/abcdefghijk\n", encoding="utf-8")
+    conn = make_store()
+
+    def failing_add(conn, links):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(batch_store, "add_links", failing_add)
+    with pytest.raises(sqlite3.OperationalError):
+        batch_store.import_legacy_file(conn, str(path))
+    assert path.exists()
+
+    monkeypatch.undo()
+    assert batch_store.import_legacy_file(conn, str(path)) == 1
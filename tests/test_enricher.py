@@ -0,0 +1,39 @@
+# tests/test_enricher.py
+import types
+
+from video_meta import SubtitleTrack, VideoMeta
+
+
+def make_video(subtitle=None) -> VideoMeta:
+    return VideoMeta(
+        id="abcdefghijk",
+        title="Title",
+        webpage_url="https://www.youtube.com/watch?v=abcdefghijk",
+        description="About the video",
+        thumbnail_url="",
+        uploader="Someone",
+        duration=60,
+        subtitle=subtitle,
+    )
+
+
+def test_enricher_imports(enricher):
+    assert enricher.VideoMeta is VideoMeta
+    assert callable(enricher.main)
+
+
+def test_transcript_uses_selected_subtitle_track(enricher, monkeypatch):
+    ttml = "<tt><body><p>Hello</p><p>world</p></body></tt>"
+    requested = []
+
+    def fake_get(url, timeout):
+        requested.append(url)
+        return types.SimpleNamespace(text=ttml, raise_for_status=lambda: None)
+
+    monkeypatch.setattr(enricher.requests, "get", fake_get)
+    track = SubtitleTrack("en", "ttml", "https://example.com/subs.ttml", False)
+    transcript = enricher.get_video_transcript(make_video(track))
+
+    assert requested == ["https://example.com/subs.ttml"]
+    assert transcript.endswith("Transcript:\nHello world")
+    assert "About the video" in transcript
@@ -0,0 +1,43 @@
+# tests/test_facets.py
+import sqlite3
+
+import facets
+
+
+def test_unfiltered_browse_uses_processed_at_index(app_module, db_file):
+    conn = sqlite3.connect(db_file)
+    plan = conn.execute(
+        "EXPLAIN QUERY PLAN SELECT * FROM videos ORDER BY processed_at DESC LIMIT 50"
+    ).fetchall()
+    details = " ".join(row[-1] for row in plan)
+    assert "idx_videos_processed_at" in details
+    assert "TEMP B-TREE" not in details
+
+
+def test_updating_a_missing_video_does_not_count_its_tags(app_module, db_file):
+    client = app_module.app.test_client()
+    payload = {
+        "name": "x",
+        "uploader": "x",
+        "category": "Music",
+        "summary": "x",
+        "tags": "ghost, phantom",
+    }
+    assert client.put("/api/videos/9999", json=payload).status_code == 404
+
+    conn = sqlite3.connect(db_file)
+    assert facets.tag_histogram(conn) == []
+
+
+def test_error_is_a_real_tag_but_legacy_placeholders_are_dropped(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.execute(
+        "CREATE TABLE videos (id INTEGER PRIMARY KEY, tags TEXT, category TEXT, processed_at TIMESTAMP)"
+    )
+    conn.execute("INSERT INTO videos (tags, category) VALUES ('Error', 'Uncategorized')")
+    conn.execute("INSERT INTO videos (tags, category) VALUES ('Error, Python', 'Education')")
+    facets.setup_facet_tables(conn)
+
+    tags = conn.execute("SELECT tags FROM videos ORDER BY id").fetchall()
+    assert tags == [("",), ("Error, Python",)]
+    assert facets.parse_tags("error, Python") == ["error", "Python"]
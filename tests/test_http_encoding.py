@@ -0,0 +1,17 @@
+# tests/test_http_encoding.py
+import json
+from datetime import date, datetime
+
+from flask.json.provider import DefaultJSONProvider
+
+import http_encoding
+
+
+def test_dumps_matches_flask_default_encoding():
+    obj = {
+        "b": datetime(2024, 5, 1, 12, 30),
+        "a": date(2024, 5, 1),
+        "rows": [{"id": 1, "name": "Café"}, None],
+    }
+    expected = json.dumps(obj, default=DefaultJSONProvider.default)
+    assert json.loads(http_encoding.dumps(obj)) == json.loads(expected)
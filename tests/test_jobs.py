@@ -0,0 +1,50 @@
+# tests/test_jobs.py
+import os
+import subprocess
+import sys
+
+import jobs
+
+HOLD_LOCK = """
+import sys, time
+import jobs
+assert jobs.acquire_lock(sys.argv[1])
+print("locked", flush=True)
+time.sleep(60)
+"""
+
+
+def test_lock_is_exclusive_and_released(tmp_path):
+    path = str(tmp_path / "enrichment.lock")
+    assert not jobs.lock_is_held(path)
+    assert jobs.acquire_lock(path)
+    assert jobs.lock_is_held(path)
+    assert not jobs.acquire_lock(path)
+    jobs.release_lock(path)
+    assert not jobs.lock_is_held(path)
+    assert jobs.acquire_lock(path)
+    jobs.release_lock(path)
+
+
+def test_lock_of_dead_process_is_free_even_if_pid_file_looks_alive(tmp_path):
+    path = str(tmp_path / "enrichment.lock")
+    root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    owner = subprocess.Popen(
+        [sys.executable, "-c", HOLD_LOCK, path],
+        cwd=root,
+        stdout=subprocess.PIPE,
+        text=True,
+    )
+    try:
+        assert owner.stdout.readline().strip() == "locked"
+        assert jobs.lock_is_held(path)
+        assert not jobs.acquire_lock(path)
+    finally:
+        owner.kill()
+        owner.wait()
+    # Simulate pid reuse: the file names a live process (this one).
+    with open(path, "w") as f:
+        f.write(str(os.getpid()))
+    assert not jobs.lock_is_held(path)
+    assert jobs.acquire_lock(path)
+    jobs.release_lock(path)
@@ -0,0 +1,39 @@
+# tests/test_library_io.py
+import sqlite3
+import types
+
+import pytest
+
+import library_io
+
+
+def test_non_object_records_are_rejected_and_rolled_back(app_module, db_file):
+    conn = sqlite3.connect(db_file)
+    records = [
+        {"url": "https://example.com/a", "playlist_url": "https://example.com/list"},
+        [1, 2],
+    ]
+    with pytest.raises(ValueError):
+        library_io.import_records(conn, records)
+    assert conn.execute("SELECT COUNT(*) FROM playlists").fetchone()[0] == 0
+
+
+def test_malformed_csv_is_a_value_error(tmp_path):
+    path = tmp_path / "library.csv"
+    # One summary beyond csv's field size limit.
+    summary = "x" * (17 * 1024 * 1024)
+    path.write_text(f"url,summary\nhttps://example.com/a,{summary}\n", encoding="utf-8")
+    with pytest.raises(ValueError):
+        list(library_io.read_records(str(path)))
+
+
+def test_failed_import_is_logged_and_cleaned_up(app_module, tmp_path):
+    path = tmp_path / "library.ndjson"
+    path.write_text("[1, 2]\n", encoding="utf-8")
+    discarded = []
+    spool = types.SimpleNamespace(path=str(path), discard=lambda: discarded.append(True))
+
+    app_module.run_import(spool, "ndjson")
+
+    assert app_module.log_queue.get_nowait().startswith("ERROR: Library import failed")
+    assert discarded == [True]
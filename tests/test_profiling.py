@@ -0,0 +1,24 @@
+# tests/test_profiling.py
+import cProfile
+
+import config
+import profiling
+
+
+def test_profiles_saved_in_the_same_second_are_all_kept(tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path))
+    monkeypatch.setattr(config, "PROFILE_RETENTION", 100)
+    names = {profiling.save(cProfile.Profile(), "api", "get_videos") for _ in range(5)}
+
+    assert len(names) == 5
+    assert set(profiling.list_profiles("api")) == names
+
+
+def test_profiled_requests_get_their_own_files(app_module, tmp_path, monkeypatch):
+    monkeypatch.setattr(config, "PROFILE_DIR", str(tmp_path / "profiles"))
+    client = app_module.app.test_client()
+    names = {
+        client.get("/api/routing/stats?profile=1").headers["X-Profile"] for _ in range(5)
+    }
+    assert len(names) == 5
+    assert len(profiling.list_profiles("api")) == 5
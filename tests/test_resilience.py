@@ -0,0 +1,88 @@
+# tests/test_resilience.py
+import sqlite3
+from datetime import datetime, timedelta
+
+import pytest
+
+import config
+import resilience
+
+
+class APIError(Exception):
+    """Shaped like google.genai.errors.APIError, which carries the HTTP status as `code`."""
+
+    def __init__(self, code: int, message: str):
+        super().__init__(f"{code} {message}")
+        self.code = code
+
+
+class DownloadError(Exception):
+    """yt-dlp reports everything as a DownloadError with the site's message."""
+
+
+@pytest.mark.parametrize("code", [429, 500, 503])
+def test_genai_transient_status_codes_are_retryable(code):
+    assert isinstance(resilience.classify_error(APIError(code, "x")), resilience.RetryableError)
+
+
+def test_genai_bad_request_is_terminal():
+    error = resilience.classify_error(APIError(400, "INVALID_ARGUMENT"))
+    assert isinstance(error, resilience.TerminalError)
+
+
+def test_yt_dlp_messages():
+    private = DownloadError(
+        "ERROR: [youtube] abcdefghijk: Private video. Sign in if you've been granted access"
+    )
+    throttled = DownloadError(
+        "ERROR: unable to download video data: HTTP Error 429: Too Many Requests"
+    )
+    assert isinstance(resilience.classify_error(private), resilience.TerminalError)
+    assert isinstance(resilience.classify_error(throttled), resilience.RetryableError)
+
+
+def test_retry_delay_hint():
+    exc = APIError(
+        429,
+        "RESOURCE_EXHAUSTED. {'@type': 'type.googleapis.com/google.rpc.RetryInfo', "
+        "'retryDelay': '37s'}",
+    )
+    assert resilience.parse_retry_after(exc) == 37.0
+    assert resilience.classify_error(exc).retry_after == 37.0
+
+
+def test_backoff_is_capped_and_honours_retry_after(monkeypatch):
+    monkeypatch.setattr(resilience.random, "uniform", lambda low, high: high)
+    assert resilience.backoff_delay(1) == config.RETRY_BASE_DELAY
+    assert resilience.backoff_delay(3) == config.RETRY_BASE_DELAY * 4
+    assert resilience.backoff_delay(30) == config.RETRY_MAX_DELAY
+    assert resilience.backoff_delay(1, retry_after=37) == 37
+
+
+def test_circuit_opens_half_opens_and_reopens(db_file, monkeypatch):
+    monkeypatch.setattr(config, "CIRCUIT_FAILURE_THRESHOLD", 3)
+    error = resilience.RetryableError("503 UNAVAILABLE")
+    for _ in range(2):
+        resilience.record_failure(resilience.GEMINI, error)
+    assert resilience.circuit_wait(resilience.GEMINI) == 0
+
+    resilience.record_failure(resilience.GEMINI, error)
+    assert resilience.circuit_wait(resilience.GEMINI) > 0
+    with pytest.raises(resilience.CircuitOpenError):
+        resilience.call_with_retry(resilience.GEMINI, pytest.fail, "circuit should be open")
+
+    # Once the cooldown passes the circuit half-opens and lets one call through.
+    conn = sqlite3.connect(db_file)
+    past = datetime.now() - timedelta(seconds=1)
+    conn.execute("UPDATE circuit_breakers SET open_until = ?", (past,))
+    conn.commit()
+    assert resilience.circuit_wait(resilience.GEMINI) == 0
+
+    # A failure while half-open re-opens it straight away...
+    resilience.record_failure(resilience.GEMINI, error)
+    assert resilience.circuit_wait(resilience.GEMINI) > 0
+
+    # ...and a success closes it again.
+    resilience.record_success(resilience.GEMINI)
+    assert resilience.circuit_wait(resilience.GEMINI) == 0
+    assert resilience.open_circuits() == {}
@@ -0,0 +1,26 @@
+# tests/test_routing.py
+import routing
+
+
+def test_routes_by_item_type():
+    assert routing.choose_route("video", 50000).name == "long"
+    assert routing.choose_route("webpage", 50000).name == "webpage"
+    assert routing.choose_route("file", 50000).name == "long-file"
+    assert routing.choose_route("file", 500).name == "short"
+
+
+def test_file_routed_on_full_length_but_sent_capped(enricher, monkeypatch, tmp_path):
+    sent = []
+
+    def fake_generate(route, model, prompt, fallback=False):
+        sent.append((route, prompt))
+        return None
+
+    monkeypatch.setattr(enricher, "get_text_from_pdf", lambda path: "§" * 100000)
+    monkeypatch.setattr(enricher, "generate_with_route", fake_generate)
+    monkeypatch.setattr(enricher, "parse_gemini_response", lambda response: {})
+    enricher.process_file(str(tmp_path / "report.pdf"), None)
+
+    route, prompt = sent[0]
+    assert route.name == "long-file"
+    assert prompt.count("§") == route.max_input_chars
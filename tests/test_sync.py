@@ -0,0 +1,51 @@
+# tests/test_sync.py
+import sqlite3
+from datetime import datetime
+
+import sync
+
+
+def test_channel_urls_must_be_on_youtube():
+    assert sync.is_channel_url("https://www.youtube.com/@someone")
+    assert sync.is_channel_url("https://m.youtube.com/channel/UC123")
+    assert not sync.is_channel_url("https://example.com/@someone")
+    assert not sync.is_channel_url("https://example.com/user/someone")
+    assert sync.listing_url("https://example.com/c/page") == "https://example.com/c/page"
+
+
+def test_sync_without_new_videos_keeps_playlist_processed_at(app_module, enricher, db_file, monkeypatch):
+    url = "https://www.youtube.com/playlist?list=PL123"
+    listing = {
+        "webpage_url": url,
+        "title": "Followed",
+        "entries": [{"id": "abcdefghijk", "url": "https://www.youtube.com/watch?v=abcdefghijk"}],
+    }
+    monkeypatch.setattr(enricher, "fetch_flat_listing", lambda listing_url: listing)
+    conn = sqlite3.connect(db_file)
+    source_id = sync.add_source(conn, url)
+    sync.mark_seen(conn, source_id, ["abcdefghijk"])
+    earlier = datetime(2024, 1, 1)
+    playlist_id = enricher.upsert_playlist(conn, listing, url)
+    conn.execute("UPDATE playlists SET processed_at = ? WHERE id = ?", (earlier, playlist_id))
+    conn.commit()
+
+    assert enricher.sync_source(conn, url, None) == 0
+
+    processed_at = conn.execute(
+        "SELECT processed_at FROM playlists WHERE id = ?", (playlist_id,)
+    ).fetchone()[0]
+    assert processed_at == str(earlier)
+
+
+def test_follow_rejects_invalid_interval(app_module, db_file):
+    client = app_module.app.test_client()
+    url = "https://www.youtube.com/playlist?list=PL123"
+    for interval in ("daily", 0, -2, True, [1]):
+        response = client.post("/api/sync/sources", json={"url": url, "interval_hours": interval})
+        assert response.status_code == 400
+    response = client.post("/api/sync/sources", json={"url": url, "interval_hours": "12"})
+    assert response.status_code == 201
+
+    conn = sqlite3.connect(db_file)
+    assert conn.execute("SELECT interval_hours FROM sync_sources").fetchall() == [(12.0,)]
+    assert sync.claim_due_sources(conn) == [sync.listing_url(url)]
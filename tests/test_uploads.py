@@ -0,0 +1,43 @@
+# tests/test_uploads.py
+import io
+import os
+
+import upload_store
+
+
+def part_files():
+    return [name for name in os.listdir("uploads") if name.endswith(upload_store.PART_SUFFIX)]
+
+
+def test_unused_upload_parts_are_discarded(app_module):
+    client = app_module.app.test_client()
+    response = client.post(
+        "/api/upload",
+        data={"file": (io.BytesIO(b""), ""), "other": (io.BytesIO(b"x" * 100), "x.pdf")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 400
+    assert part_files() == []
+
+
+def test_rejected_import_is_discarded(app_module):
+    client = app_module.app.test_client()
+    response = client.post(
+        "/api/import",
+        data={"file": (io.BytesIO(b"{}"), "library.xml")},
+        content_type="multipart/form-data",
+    )
+    assert response.status_code == 400
+    assert part_files() == []
+
+
+def test_other_endpoints_do_not_spool_into_uploads(app_module):
+    with app_module.app.test_request_context(
+        "/api/batch/add_links",
+        method="POST",
+        data={"file": (io.BytesIO(b"data"), "a.txt")},
+        content_type="multipart/form-data",
+    ):
+        stream = app_module.request.files["file"].stream
+        assert not isinstance(stream, upload_store.HashingSpool)
+    assert part_files() == []
@@ -0,0 +1,35 @@
+# tests/test_urls.py
+import sqlite3
+
+import urls
+
+
+def make_library():
+    conn = sqlite3.connect(":memory:")
+    conn.execute("CREATE TABLE videos (id INTEGER PRIMARY KEY, url TEXT NOT NULL)")
+    conn.execute("CREATE TABLE playlists (id INTEGER PRIMARY KEY, url TEXT NOT NULL)")
+    conn.execute("INSERT INTO videos (url) VALUES ('https://youtu.be/abcdefghijk')")
+    return conn
+
+
+def test_setup_url_keys_is_safe_to_run_twice():
+    conn = make_library()
+    urls.setup_url_keys(conn)
+    # A second worker running setup after the column exists must not crash.
+    urls.setup_url_keys(conn)
+    assert conn.execute("SELECT url_key FROM videos").fetchone()[0] == "yt:video:abcdefghijk"
+
+
+def test_find_existing_keys_stays_within_the_parameter_limit():
+    conn = make_library()
+    urls.setup_url_keys(conn)
+    conn.setlimit(sqlite3.SQLITE_LIMIT_VARIABLE_NUMBER, urls.SQLITE_MAX_PARAMS)
+    keys = [f"yt:video:{n:011d}" for n in range(1200)] + ["yt:video:abcdefghijk"]
+    assert urls.find_existing_keys(conn, keys) == {"yt:video:abcdefghijk"}
+
+
+def test_malformed_urls_fall_back_to_their_text():
+    assert urls.canonical_url_key(" http://[broken ") == "url:http://[broken"
+    assert urls.canonical_url_key("http://host:abc/") == "url:http://host:abc/"
+    assert urls.canonical_url_key("http://host:8080/a/") == "url:host:8080/a"
+
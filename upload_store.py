@@ -0,0 +1,85 @@
+# upload_store.py
+# Content-addressed storage for uploaded files. Werkzeug streams each file
+# part to disk through a HashingSpool, so the SHA-256 is known as soon as the
+# request body has been read and the file is never buffered or copied again.
+# Files are kept at uploads/<sha256>/<filename>: identical content maps to the
+# same directory (dedup), while different files with the same name no longer
+# overwrite each other.
+import hashlib
+import os
+import tempfile
+import time
+
+from werkzeug.utils import secure_filename
+
+CHUNK_SIZE = 1024 * 1024
+PART_SUFFIX = ".part"
+STALE_PART_SECONDS = 3600
+
+
+class HashingSpool:
+    """Temporary upload file that hashes data as it is written to disk."""
+
+    def __init__(self, directory: str):
+        self.file = tempfile.NamedTemporaryFile(
+            dir=directory, suffix=PART_SUFFIX, delete=False
+        )
+        self.path = self.file.name
+        self.digest = hashlib.sha256()
+        self.size = 0
+
+    def write(self, data):
+        self.digest.update(data)
+        self.size += len(data)
+        return self.file.write(data)
+
+    def __getattr__(self, name):
+        return getattr(self.file, name)
+
+    def discard(self):
+        self.file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def store_upload(file_storage, upload_folder: str):
+    """
+    Moves a streamed upload into content-addressed storage.
+    Returns (sha256, path, is_new); is_new is False when the same content was uploaded before.
+    """
+    spool = file_storage.stream
+    if not isinstance(spool, HashingSpool):
+        # Fallback for streams not created by the request's stream factory.
+        spool = HashingSpool(upload_folder)
+        for chunk in iter(lambda: file_storage.stream.read(CHUNK_SIZE), b""):
+            spool.write(chunk)
+    spool.file.close()
+    sha256 = spool.digest.hexdigest()
+
+    target_dir = os.path.join(upload_folder, sha256)
+    existing = sorted(os.listdir(target_dir)) if os.path.isdir(target_dir) else []
+    if existing:
+        spool.discard()
+        return sha256, os.path.join(target_dir, existing[0]), False
+
+    os.makedirs(target_dir, exist_ok=True)
+    filename = secure_filename(file_storage.filename or "") or "upload"
+    path = os.path.join(target_dir, filename)
+    os.replace(spool.path, path)
+    return sha256, path, True
+
+
+def discard_unused(file_storages, keep=()):
+    """Deletes the spooled parts of uploads that are not kept (already-moved parts are skipped)."""
+    for file_storage in file_storages:
+        if isinstance(file_storage.stream, HashingSpool) and file_storage not in keep:
+            file_storage.stream.discard()
+
+
+def remove_stale_parts(upload_folder: str):
+    """Deletes partial uploads left behind by aborted requests."""
+    cutoff = time.time() - STALE_PART_SECONDS
+    for name in os.listdir(upload_folder):
+        path = os.path.join(upload_folder, name)
+        if name.endswith(PART_SUFFIX) and os.path.getmtime(path) < cutoff:
+            os.remove(path)
@@ -0,0 +1,127 @@
+# urls.py
+# Canonical URL keys. Users paste the same YouTube video as youtu.be links,
+# shorts, embeds or watch URLs with the query string in any order, and yt-dlp
+# stores yet another canonical form. Every stored row gets a `url_key` computed
+# once at ingestion, so "is this already in the library?" is an indexed lookup.
+import os
+import re
+import sqlite3
+from urllib.parse import parse_qsl, urlencode, urlsplit
+
+YOUTUBE_HOSTS = {
+    "youtube.com",
+    "m.youtube.com",
+    "music.youtube.com",
+    "youtube-nocookie.com",
+    "youtu.be",
+}
+VIDEO_ID_RE = re.compile(r"^[A-Za-z0-9_-]{11}$")
+PLAYLIST_ID_RE = re.compile(r"^[A-Za-z0-9_-]+$")
+VIDEO_PATH_PREFIXES = ("shorts", "embed", "live", "v", "e")
+TRACKING_PARAMS = {"fbclid", "gclid", "si", "feature", "ref"}
+
+# SQLite's default limit on bound parameters is 999 on older builds, and
+# find_existing_keys binds every key twice (videos and playlists).
+SQLITE_MAX_PARAMS = 999
+LOOKUP_CHUNK_SIZE = SQLITE_MAX_PARAMS // 2
+
+
+def _youtube_key(host: str, path: str, query: dict):
+    segments = [s for s in path.split("/") if s]
+    video_id = None
+    if host == "youtu.be":
+        video_id = segments[0] if segments else None
+    elif path == "/watch":
+        video_id = query.get("v")
+    elif len(segments) >= 2 and segments[0] in VIDEO_PATH_PREFIXES:
+        video_id = segments[1]
+    if video_id and VIDEO_ID_RE.match(video_id):
+        return f"yt:video:{video_id}"
+    playlist_id = query.get("list")
+    if path == "/playlist" and playlist_id and PLAYLIST_ID_RE.match(playlist_id):
+        return f"yt:playlist:{playlist_id}"
+    return None
+
+
+def canonical_url_key(url: str) -> str:
+    """
+    Returns a stable key for a URL or local file path:
+    'yt:video:<id>', 'yt:playlist:<id>', 'url:<normalized url>' or 'file:<path>'.
+    """
+    url = (url or "").strip()
+    if not re.match(r"^https?://", url, re.IGNORECASE):
+        host = url.split("/")[0].lower()
+        if host.startswith("www.") or host in YOUTUBE_HOSTS:
+            # Scheme-less pastes such as "youtu.be/abc" or "www.example.com/page".
+            url = f"https://{url}"
+        else:
+            return f"file:{os.path.normpath(url)}"
+
+    try:
+        parts = urlsplit(url)
+        port = parts.port
+    except ValueError:
+        # Malformed hosts or ports ("http://[broken", "http://host:abc/") are
+        # keyed on the raw text rather than failing the whole paste.
+        return f"url:{url}"
+    host = (parts.hostname or "").lower()
+    if host.startswith("www."):
+        host = host[4:]
+    query_pairs = parse_qsl(parts.query, keep_blank_values=True)
+
+    if host in YOUTUBE_HOSTS:
+        key = _youtube_key(host, parts.path, dict(query_pairs))
+        if key:
+            return key
+
+    query = urlencode(
+        sorted(
+            (k, v)
+            for k, v in query_pairs
+            if k.lower() not in TRACKING_PARAMS and not k.lower().startswith("utm_")
+        )
+    )
+    path = parts.path.rstrip("/")
+    port = f":{port}" if port and port not in (80, 443) else ""
+    return f"url:{host}{port}{path}" + (f"?{query}" if query else "")
+
+
+def setup_url_keys(conn):
+    """Adds and backfills the indexed url_key column on videos and playlists."""
+    for table in ("videos", "playlists"):
+        # Several Gunicorn workers run this at startup; the column may appear
+        # between a check and the ALTER, so just try it.
+        try:
+            conn.execute(f"ALTER TABLE {table} ADD COLUMN url_key TEXT")
+        except sqlite3.OperationalError:
+            pass
+        conn.execute(
+            f"CREATE INDEX IF NOT EXISTS idx_{table}_url_key ON {table} (url_key)"
+        )
+        rows = conn.execute(
+            f"SELECT id, url FROM {table} WHERE url_key IS NULL"
+        ).fetchall()
+        if rows:
+            conn.executemany(
+                f"UPDATE {table} SET url_key = ? WHERE id = ?",
+                [(canonical_url_key(row[1]), row[0]) for row in rows],
+            )
+    conn.commit()
+
+
+def find_existing_keys(conn, keys) -> set:
+    """Returns the subset of keys already present in the library (videos or playlists)."""
+    keys = list(dict.fromkeys(keys))
+    found = set()
+    for start in range(0, len(keys), LOOKUP_CHUNK_SIZE):
+        chunk = keys[start : start + LOOKUP_CHUNK_SIZE]
+        placeholders = ", ".join("?" * len(chunk))
+        rows = conn.execute(
+            f"""
+            SELECT url_key FROM videos WHERE url_key IN ({placeholders})
+            UNION SELECT url_key FROM playlists WHERE url_key IN ({placeholders})
+            """,
+            chunk + chunk,
+        ).fetchall()
+        found.update(row[0] for row in rows)
+    return found
@@ -0,0 +1,79 @@
+# video_meta.py
+# Compact video metadata projected from a yt-dlp info dict.
+# A full info dict carries every format, thumbnail variant, subtitle URL map
+# and HTTP header set (often several hundred KB per video), yet enrichment
+# only reads a handful of fields. Projecting right after extraction lets the
+# big dict be freed before the transcript and LLM phase starts.
+from dataclasses import dataclass
+
+SUBTITLE_LANGUAGES = ["en", "hi"]
+SUBTITLE_FORMAT = "ttml"
+
+
+@dataclass(slots=True)
+class SubtitleTrack:
+    language: str
+    ext: str
+    url: str
+    automatic: bool
+
+
+@dataclass(slots=True)
+class VideoMeta:
+    id: str
+    title: str
+    webpage_url: str
+    description: str
+    thumbnail_url: str
+    uploader: str
+    duration: int
+    subtitle: SubtitleTrack = None
+
+    @classmethod
+    def from_info_dict(cls, info: dict) -> "VideoMeta":
+        video_id = info.get("id", "")
+        return cls(
+            id=video_id,
+            title=info.get("title", "No Title"),
+            webpage_url=info.get("webpage_url", ""),
+            description=info.get("description", ""),
+            thumbnail_url=select_thumbnail(info, video_id),
+            uploader=info.get("uploader", "Unknown Uploader"),
+            duration=info.get("duration", 0),
+            subtitle=select_subtitle(info),
+        )
+
+
+def select_thumbnail(info: dict, video_id: str) -> str:
+    thumbnail_url = info.get("thumbnail")
+    if thumbnail_url:
+        return thumbnail_url
+    thumbnails = info.get("thumbnails", [])
+    if not thumbnails:
+        return f"https://i.ytimg.com/vi/{video_id}/hqdefault.jpg"
+    hq_thumb = next(
+        (t["url"] for t in thumbnails if "hqdefault" in t.get("id", "")), None
+    )
+    maxres_thumb = next(
+        (t["url"] for t in thumbnails if "maxresdefault" in t.get("id", "")), None
+    )
+    return maxres_thumb or hq_thumb or thumbnails[-1]["url"]
+
+
+def select_subtitle(info: dict):
+    """
+    Picks one subtitle track: manual before automatic captions, then by
+    SUBTITLE_LANGUAGES order, preferring the TTML format.
+    """
+    for key, automatic in (("subtitles", False), ("automatic_captions", True)):
+        tracks = info.get(key) or {}
+        for language in SUBTITLE_LANGUAGES:
+            formats = tracks.get(language) or []
+            if not formats:
+                continue
+            chosen = next(
+                (f for f in formats if f.get("ext") == SUBTITLE_FORMAT), formats[0]
+            )
+            if chosen.get("url"):
+                return SubtitleTrack(language, chosen.get("ext", ""), chosen["url"], automatic)
+    return None
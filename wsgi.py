@@ -2,7 +2,14 @@
 # This file is the entry point for the WSGI server (like Gunicorn).
 # It imports the main Flask application instance from our app.py file.
 
-from app import app
+from app import app, setup_database, start_pending_batches, start_sync_scheduler
+
+# Resume interrupted batches. The lock on enrichment.lock makes
+# sure only one Gunicorn worker picks the work up; due syncs are claimed
+# atomically, so every worker can run the sync scheduler.
+setup_database()
+start_pending_batches()
+start_sync_scheduler()
 
 if __name__ == "__main__":
     # This allows running the app directly with 'python wsgi.py' for development,